@@ -20,7 +20,7 @@ VERSION = '0.0.28'
 # What packages are required for this module to be executed?
 # TODO cosasi could be remove if no longer using our customized cosasi package
 REQUIRED = [
-   'networkx', 'ndlib', 'torch_geometric', 'cosasi'
+   'networkx', 'numpy', 'scipy', 'ndlib', 'torch_geometric', 'cosasi'
 ]
 
 # What packages are optional?
@@ -0,0 +1,38 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from xflow.diffusion import SpreadCache
+from xflow.diffusion.weights import EdgeWeights
+import xflow.method.ibm as ibm
+import xflow.method.im as im
+
+
+def _graph():
+    g = nx.connected_watts_strogatz_graph(60, 4, 0.1, seed=0)
+    rng = np.random.default_rng(0)
+    return g, EdgeWeights.from_graph(g, rng.uniform(0.05, 0.5, g.number_of_edges()))
+
+
+@pytest.mark.parametrize('method', [im.degree, im.pi, im.sigma, im.eigen, im.Netshield])
+def test_proxy_budget_list_gives_the_int_budget_runs(method):
+    g, config = _graph()
+    sweep = method(g, config, [1, 3, 6])
+    assert sweep == {b: method(g, config, b) for b in (1, 3, 6)}
+
+
+@pytest.mark.parametrize('method', [im.greedy, im.celf, im.celfpp])
+def test_simulation_budget_list_gives_the_int_budget_runs(method):
+    g, config = _graph()
+    worlds = im.live_edge_worlds(g, config, 20, 'IC', 0.1, random_state=0)
+    sweep = method(g, config, [2, 4], rounds=20, model='IC', worlds=worlds)
+    assert sweep == {b: method(g, config, b, rounds=20, model='IC', worlds=worlds) for b in (2, 4)}
+
+
+def test_ibm_greedy_budget_list_gives_the_int_budget_runs():
+    g = nx.connected_watts_strogatz_graph(20, 4, 0.1, seed=0)
+    config = EdgeWeights.from_graph(g, np.full(g.number_of_edges(), 0.3))
+    # one cache: every seed set is estimated once, so the runs see the same spreads
+    cache = SpreadCache()
+    sweep = ibm.greedy(g, config, [1, 3], [0, 10], rounds=10, model='IC', cache=cache)
+    assert sweep == {b: ibm.greedy(g, config, b, [0, 10], rounds=10, model='IC', cache=cache) for b in (1, 3)}
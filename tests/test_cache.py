@@ -0,0 +1,45 @@
+import networkx as nx
+import numpy as np
+
+from xflow.diffusion import SpreadCache
+from xflow.diffusion.engine import compile_graph
+from xflow.diffusion.weights import EdgeWeights
+import xflow.IM.IM_baselines as imb
+import xflow.method.im as im
+
+
+def _graph():
+    g = nx.connected_watts_strogatz_graph(40, 4, 0.1, seed=0)
+    for a, b in g.edges():
+        g[a][b]['weight'] = 0.2
+    return g, EdgeWeights.from_graph(g)
+
+
+def test_greedy_methods_accept_a_cache():
+    g, config = _graph()
+    for method in (imb.greedy, imb.celf, imb.celfpp, im.celf):
+        cache = SpreadCache()
+        first = method(g, config, 2, rounds=5, model='IC', cache=cache)
+        misses = cache.misses
+        assert misses > 0
+        # a second run is answered from the cache alone
+        assert method(g, config, 2, rounds=5, model='IC', cache=cache) == first
+        assert cache.misses == misses
+
+
+def test_cache_persists_in_sqlite(tmp_path):
+    g, config = _graph()
+    path = str(tmp_path / 'spread.sqlite')
+    with SpreadCache(path=path) as cache:
+        first = im.celf(g, config, 2, rounds=5, model='IC', cache=cache)
+    with SpreadCache(path=path) as cache:
+        assert im.celf(g, config, 2, rounds=5, model='IC', cache=cache) == first
+        assert cache.misses == 0 and cache.hits > 0
+
+
+def test_cache_key_depends_on_weights():
+    g, config = _graph()
+    other = EdgeWeights.from_graph(g, np.full(g.number_of_edges(), 0.3))
+    cache = SpreadCache()
+    assert cache.key(compile_graph(g, config), 'IC', [0]) != cache.key(compile_graph(g, other), 'IC', [0])
+    assert cache.key(compile_graph(g, config), 'IC', [0, 1]) == cache.key(compile_graph(g, config), 'IC', [1, 0])
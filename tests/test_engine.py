@@ -0,0 +1,121 @@
+import gc
+import statistics as s
+
+import networkx as nx
+import numpy as np
+import ndlib.models.ModelConfig as mc
+import pytest
+
+from xflow.diffusion import IC, LT, SI, engine
+from xflow.diffusion.engine import compile_graph
+from xflow.diffusion.parallel import parallel_simulate
+from xflow.diffusion.weights import EdgeWeights
+
+
+def _config(g, p):
+    config = mc.Configuration()
+    for a, b in g.edges():
+        config.add_edge_configuration('threshold', (a, b), p)
+    return config
+
+
+def test_compile_graph_new_config_on_same_graph():
+    g = nx.connected_watts_strogatz_graph(200, 6, 0.1, seed=0)
+    # each config is freed before the next one is made, so ids get reused
+    for p in (0.01, 0.5, 0.02, 0.4, 0.03):
+        config = _config(g, p)
+        assert np.allclose(compile_graph(g, config).weights, p)
+        del config
+        gc.collect()
+
+    config = _config(g, 0.5)
+    spread = np.mean(parallel_simulate(compile_graph(g, config), 'IC', [0, 1, 2], 200, horizon=None,
+                                       random_state=0))
+    assert spread > 100
+
+
+def test_compile_graph_colliding_ids(monkeypatch):
+    # what a reused id() looks like to the cache
+    monkeypatch.setattr(engine, 'id', lambda obj: 0, raising=False)
+    g = nx.path_graph(10)
+    low, high = _config(g, 0.01), _config(g, 0.5)
+    assert np.allclose(compile_graph(g, low).weights, 0.01)
+    assert np.allclose(compile_graph(g, high).weights, 0.5)
+
+
+def test_compile_graph_without_config_uses_unit_weights():
+    g = nx.path_graph(10)
+    compile_graph(g, _config(g, 0.2))
+    assert np.allclose(compile_graph(g, None).weights, 1)
+
+
+def test_compile_graph_is_cached_per_config():
+    g = nx.path_graph(10)
+    a, b = _config(g, 0.2), _config(g, 0.3)
+    first = compile_graph(g, a)
+    compile_graph(g, b)
+    assert compile_graph(g, a) is first
+
+
+def test_packed_kernels_with_hubs_above_the_edge_chunk(monkeypatch):
+    g = nx.star_graph(40)
+    g.add_edges_from((i, i + 1) for i in range(1, 40))
+    cg = compile_graph(g, _config(g, 0.3))
+    nodes = np.arange(cg.n)
+    expected = {model: engine.simulate(cg, model, [0, 5], 256, rng=np.random.default_rng(1), packed=True)
+                for model in ('IC', 'SI')}
+
+    # the hub has 40 out-edges, several chunks' worth
+    monkeypatch.setattr(engine, 'EDGE_CHUNK', 4)
+    chunks = engine._node_chunks(cg, nodes)
+    assert all(chunk.size for chunk in chunks)
+    assert np.array_equal(np.concatenate(chunks), nodes)
+    for model in ('IC', 'SI'):
+        spread = engine.simulate(cg, model, [0, 5], 256, rng=np.random.default_rng(1), packed=True)
+        assert np.array_equal(spread, expected[model])
+
+
+# native engine vs ndlib
+
+
+def _random_weights(g, low, high, seed=0):
+    rng = np.random.default_rng(seed)
+    return EdgeWeights.from_graph(g, rng.uniform(low, high, g.number_of_edges()))
+
+
+def _agree(a, b):
+    # means of two samples within 4 standard errors of their difference
+    se = np.sqrt(s.variance(a) / len(a) + s.variance(b) / len(b))
+    return abs(s.mean(a) - s.mean(b)) <= 4 * se + 1e-9
+
+
+@pytest.mark.parametrize('model, run', [
+    ('IC', lambda g, config, **kw: IC(g, config, [0, 1, 2], **kw)),
+    ('LT', lambda g, config, **kw: LT(g, config, [0, 1, 2], **kw)),
+    ('SI', lambda g, config, **kw: SI(g, config, [0, 1, 2], beta=0.1, **kw)),
+])
+@pytest.mark.parametrize('horizon', [engine.STEPS, None])
+def test_native_matches_ndlib(model, run, horizon):
+    g = nx.connected_watts_strogatz_graph(100, 6, 0.2, seed=0)
+    config = _random_weights(g, 0.1, 0.4)
+    np.random.seed(0)
+    reference = run(g, config, rounds=300, engine='ndlib', horizon=horizon)
+    native = run(g, config, rounds=3000, random_state=0, horizon=horizon)
+    assert _agree(native, reference)
+
+
+def test_batched_and_packed_kernels_agree():
+    g = nx.connected_watts_strogatz_graph(300, 6, 0.2, seed=1)
+    cg = compile_graph(g, _random_weights(g, 0.05, 0.3))
+    for model in ('IC', 'SI'):
+        batched = engine.simulate(cg, model, [0, 1], 2000, rng=np.random.default_rng(0), packed=False)
+        packed = engine.simulate(cg, model, [0, 1], 2000, rng=np.random.default_rng(1), packed=True)
+        assert _agree(list(batched), list(packed))
+
+
+def test_parallel_simulate_is_deterministic_across_jobs():
+    g = nx.connected_watts_strogatz_graph(200, 6, 0.2, seed=2)
+    cg = compile_graph(g, _random_weights(g, 0.05, 0.3))
+    one = parallel_simulate(cg, 'IC', [0, 5], 500, random_state=7, n_jobs=1)
+    two = parallel_simulate(cg, 'IC', [0, 5], 500, random_state=7, n_jobs=2)
+    assert list(one) == list(two)
@@ -0,0 +1,69 @@
+import networkx as nx
+import numpy as np
+import ndlib.models.epidemics as ep
+import ndlib.models.ModelConfig as mc
+import pytest
+
+from xflow.diffusion import SIR, SIS, iteration_bunch
+
+SEEDS = [0, 50]
+
+
+def _graph():
+    return nx.connected_watts_strogatz_graph(100, 6, 0.1, seed=0)
+
+
+def _ndlib_model(g, name, beta, rate):
+    model = ep.SIRModel(g) if name == 'SIR' else ep.SISModel(g)
+    config = mc.Configuration()
+    config.add_model_parameter('beta', beta)
+    config.add_model_parameter('gamma' if name == 'SIR' else 'lambda', rate)
+    config.add_model_initial_configuration("Infected", SEEDS)
+    model.set_initial_status(config)
+    return model
+
+
+def _ndlib_counts(g, name, beta, rate, runs, steps):
+    counts = []
+    for _ in range(runs):
+        iterations = _ndlib_model(g, name, beta, rate).iteration_bunch(steps + 1, node_status=False)
+        counts.append([[it['node_count'][c] for c in sorted(it['node_count'])] for it in iterations])
+    return np.array(counts)
+
+
+@pytest.mark.parametrize('name, run', [('SIR', SIR), ('SIS', SIS)])
+def test_compartments_match_ndlib(name, run):
+    g = _graph()
+    reference = _ndlib_counts(g, name, 0.1, 0.2, 300, 10)
+    native = run(g, None, SEEDS, 2000, 0.1, 0.2, horizon=10, random_state=0)
+    assert native.shape[1:] == reference.shape[1:]
+    # every compartment after every step, within 4 standard errors
+    se = np.sqrt(reference.var(axis=0) / len(reference) + native.var(axis=0) / len(native))
+    assert np.all(np.abs(reference.mean(axis=0) - native.mean(axis=0)) <= 4 * se + 1e-9)
+
+
+@pytest.mark.parametrize('name', ['SIR', 'SIS'])
+def test_iteration_bunch_is_a_drop_in(name):
+    g = _graph()
+    expected = _ndlib_model(g, name, 0.1, 0.2).iteration_bunch(3)
+    model = _ndlib_model(g, name, 0.1, 0.2)
+    first = iteration_bunch(model, 3, rng=0)
+    assert [it.keys() for it in first] == [it.keys() for it in expected]
+    assert [it['iteration'] for it in first] == [0, 1, 2]
+    assert first[0] == expected[0]
+
+    # the model moves on: the status is the last one reported, iterations continue
+    status = dict(first[0]['status'])
+    for it in first[1:]:
+        status.update(it['status'])
+        assert sum(it['status_delta'].values()) == 0
+    assert model.status == status
+    assert model.actual_iteration == 3
+    counts = {c: list(status.values()).count(c) for c in first[-1]['node_count']}
+    assert counts == first[-1]['node_count']
+
+    # ndlib and native bunches can be mixed
+    second = model.iteration_bunch(2)
+    assert [it['iteration'] for it in second] == [3, 4]
+    third = iteration_bunch(model, 2, rng=1)
+    assert [it['iteration'] for it in third] == [5, 6]
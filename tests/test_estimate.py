@@ -0,0 +1,48 @@
+import networkx as nx
+import numpy as np
+
+from xflow.diffusion.engine import compile_graph
+from xflow.diffusion.estimate import adaptive_spread
+from xflow.diffusion.weights import EdgeWeights
+
+
+def _cg(p=0.1):
+    g = nx.connected_watts_strogatz_graph(200, 6, 0.1, seed=0)
+    return compile_graph(g, EdgeWeights.from_graph(g, np.full(g.number_of_edges(), p)))
+
+
+def test_stops_on_relative_tolerance():
+    estimate = adaptive_spread(_cg(), 'IC', [0, 50], rel_tol=0.05, random_state=0)
+    assert estimate.converged
+    assert estimate.half_width <= 0.05 * estimate.mean
+    assert 64 <= estimate.rounds < 10000
+
+
+def test_stops_on_absolute_tolerance():
+    estimate = adaptive_spread(_cg(), 'IC', [0, 50], rel_tol=None, abs_tol=0.5, random_state=0)
+    assert estimate.converged
+    assert estimate.half_width <= 0.5
+    # abs_tol takes precedence over a tighter rel_tol
+    loose = adaptive_spread(_cg(), 'IC', [0, 50], rel_tol=1e-6, abs_tol=0.5, random_state=0)
+    assert loose.converged and loose.rounds == estimate.rounds
+
+
+def test_respects_max_rounds():
+    estimate = adaptive_spread(_cg(), 'IC', [0, 50], rel_tol=1e-6, min_rounds=64, max_rounds=300,
+                               random_state=0)
+    assert not estimate.converged
+    assert estimate.rounds == 300
+
+
+def test_deterministic_spread_converges_on_the_first_batch():
+    # with p = 0 the spread is the seed set itself
+    estimate = adaptive_spread(_cg(0.0), 'IC', [0, 50], min_rounds=32, random_state=0)
+    assert estimate.converged and estimate.rounds == 32
+    assert estimate.mean == 2 and estimate.stdev == 0
+
+
+def test_same_random_state_for_any_n_jobs():
+    one = adaptive_spread(_cg(), 'IC', [0, 50], rel_tol=0.03, random_state=5, n_jobs=1)
+    two = adaptive_spread(_cg(), 'IC', [0, 50], rel_tol=0.03, random_state=5, n_jobs=2)
+    assert one.results == two.results
+    assert one.rounds > 64
@@ -0,0 +1,47 @@
+import networkx as nx
+
+from xflow.diffusion.weights import EdgeWeights
+import xflow.IM.IM_baselines as imb
+import xflow.method.im as im
+
+
+def _graph():
+    g = nx.connected_watts_strogatz_graph(40, 4, 0.1, seed=0)
+    for a, b in g.edges():
+        g[a][b]['weight'] = 0.2
+    return g, EdgeWeights.from_graph(g)
+
+
+def test_lazy_greedy_matches_greedy_on_fixed_worlds():
+    g, config = _graph()
+    # seeded: greedy and CELF break exact ties differently
+    worlds = im.live_edge_worlds(g, config, 20, 'IC', 0.1, random_state=1)
+    expected = im.greedy(g, config, 3, rounds=20, model='IC', worlds=worlds)
+    assert im.celf(g, config, 3, rounds=20, model='IC', worlds=worlds) == expected
+    assert im.celfpp(g, config, 3, rounds=20, model='IC', worlds=worlds) == expected
+
+
+def test_celfpp_reports_its_evaluations():
+    g, config = _graph()
+    for method in (im.celfpp, imb.celfpp):
+        stats = im.CELFStats()
+        method(g, config, 3, rounds=5, model='IC', stats=stats)
+        # every node is evaluated at least once, at most twice per round
+        assert g.number_of_nodes() <= stats.evaluations <= 2 * 3 * g.number_of_nodes()
+        assert stats.avoided >= 0
+
+
+def test_celfpp_lookahead_shares_random_numbers():
+    g, config = _graph()
+    # by default CELF++ measures IC spreads on the cached live-edge worlds of g
+    worlds = im.live_edge_worlds(g, config, 20, 'IC', 0.1)
+    assert im.celfpp(g, config, 4, rounds=20, model='IC') == \
+        im.celfpp(g, config, 4, rounds=20, model='IC', worlds=worlds)
+
+
+def test_celfpp_without_worlds_skips_the_lookahead():
+    g, config = _graph()
+    stats = im.CELFStats()
+    im.celfpp(g, config, 3, rounds=5, model='IC', worlds=False, stats=stats)
+    # independent Monte Carlo estimates: no look-ahead evaluations, none avoided
+    assert stats.avoided == 0
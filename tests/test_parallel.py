@@ -0,0 +1,31 @@
+import networkx as nx
+import numpy as np
+
+from xflow.diffusion.engine import compile_graph
+from xflow.diffusion.parallel import score_candidates
+from xflow.diffusion.weights import EdgeWeights
+
+
+def _cycle():
+    g = nx.cycle_graph(400)
+    return compile_graph(g, EdgeWeights.from_graph(g, np.full(g.number_of_edges(), 0.5)))
+
+
+def test_unseeded_workers_draw_independent_rounds():
+    cg = _cycle()
+    candidates = [0, 100, 200, 300]
+    runs = [score_candidates(cg, 'IC', [], candidates, rounds=20, n_jobs=4, chunks_per_job=1) for _ in range(3)]
+    # equivalent candidates on the cycle: only independent noise tells them apart
+    assert len({score for run in runs for score in run}) > 4
+
+
+def test_scores_follow_unsorted_and_repeated_candidates():
+    g = nx.star_graph(30)
+    nx.add_path(g, range(31, 60))
+    cg = compile_graph(g, EdgeWeights.from_graph(g, np.full(g.number_of_edges(), 0.3)))
+    candidates = [45, 0, 12, 0, 59, 3, 31, 0]
+    one = score_candidates(cg, 'IC', [], candidates, rounds=50, random_state=3, n_jobs=1)
+    three = score_candidates(cg, 'IC', [], candidates, rounds=50, random_state=3, n_jobs=3)
+    assert one == three
+    # the hub beats every leaf and path node
+    assert np.argmax(one) in (1, 3, 7)
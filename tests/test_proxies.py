@@ -0,0 +1,97 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from xflow.diffusion.weights import EdgeWeights
+from xflow.method import im
+
+
+def _weights(g, seed=0):
+    rng = np.random.default_rng(seed)
+    return EdgeWeights.from_graph(g, rng.uniform(0.05, 0.9, g.number_of_edges()))
+
+
+@pytest.mark.parametrize('g', [nx.path_graph(8), nx.star_graph(6), nx.empty_graph(5),
+                               nx.union(nx.star_graph(6), nx.path_graph([10, 11]))])
+@pytest.mark.parametrize('batch', [None, 1, 2])
+def test_netshield_runs_out_of_edges(g, batch):
+    budget = g.number_of_nodes() - 2
+    nodes = im.Netshield(g, _weights(g), budget, batch=batch)
+    assert len(nodes) == budget == len(set(nodes))
+
+
+def test_netshield_dense_reference():
+    g = nx.gnp_random_graph(60, 0.1, seed=1)
+    config = _weights(g)
+    A = config.matrix().toarray().astype(float)
+    lam, u = np.linalg.eigh(A)
+    lam, u = lam[-1], np.abs(u[:, -1])
+    nodes = []
+    for _ in range(5):
+        b = A[:, nodes] @ u[nodes] if nodes else np.zeros_like(u)
+        score = 2 * lam * u ** 2 - 2 * b * u
+        score[nodes] = -1
+        nodes.append(int(np.argmax(score)))
+    assert im.Netshield(g, config, 5) == nodes
+
+
+def test_netshield_plus_first_batch():
+    g = nx.gnp_random_graph(80, 0.08, seed=2)
+    config = _weights(g)
+    assert im.Netshield(g, config, 12, batch=4)[:4] == im.Netshield(g, config, 4)
+
+
+def _eigen_reference(g, budget):
+    # the original selection: unweighted eigenvector centrality, removing each pick
+    g = g.copy()
+    nodes = []
+    for _ in range(budget):
+        centrality = nx.eigenvector_centrality_numpy(g)
+        node = max(centrality, key=centrality.get)
+        nodes.append(node)
+        g.remove_node(node)
+    return nodes
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_eigen_matches_networkx(seed):
+    g = nx.connected_watts_strogatz_graph(150, 6, 0.1, seed=seed)
+    # the weights must not change the ranking
+    assert im.eigen(g, _weights(g, seed), 8) == _eigen_reference(g, 8)
+
+
+def _dense_proxy(g, budget, score):
+    # the original selections: rebuild the dense matrix of the remaining nodes for every pick
+    g = g.copy()
+    nodes = []
+    for _ in range(budget):
+        remaining = list(g.nodes())
+        values = score(nx.to_numpy_array(g, nodelist=remaining))
+        node = remaining[int(np.argmax(values))]
+        nodes.append(node)
+        g.remove_node(node)
+    return nodes
+
+
+def _dense_pi(A):
+    N = np.ones_like(A)
+    for i in range(5):
+        N *= 1 - np.power(A, i + 1)
+    return (1 - N).sum(axis=1)
+
+
+def _dense_sigma(A):
+    sigma = np.ones(len(A))
+    for i in range(5):
+        sigma += np.power(A, i + 1) @ sigma
+    return sigma
+
+
+@pytest.mark.parametrize('directed', [False, True])
+@pytest.mark.parametrize('method, score', [(im.pi, _dense_pi), (im.sigma, _dense_sigma)])
+def test_pi_and_sigma_match_dense_reference(directed, method, score):
+    g = nx.gnp_random_graph(50, 0.1, seed=4, directed=directed)
+    config = _weights(g, 4)
+    for a, b in g.edges():
+        g[a][b]['weight'] = config.config["edges"]['threshold'][(a, b)]
+    assert method(g, config, 6) == _dense_proxy(g, 6, score)
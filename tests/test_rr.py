@@ -0,0 +1,153 @@
+import itertools
+import math
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from xflow.diffusion.engine import compile_graph
+from xflow.diffusion.parallel import parallel_simulate
+from xflow.diffusion.weights import EdgeWeights
+from xflow.method.im import OPIMC
+from xflow.method.rr import RRSampler, RRCollection, ParallelRRSampler, SamplingStats
+from xflow.method.rr_store import estimate_spread
+
+
+def _graph(n=300, seed=0, directed=False):
+    g = nx.connected_watts_strogatz_graph(n, 6, 0.2, seed=seed)
+    if directed:
+        g = g.to_directed()
+    rng = np.random.default_rng(seed)
+    return g, EdgeWeights.from_graph(g, rng.uniform(0.05, 0.3, g.number_of_edges()))
+
+
+def _collection(cg, count, model='IC', seed=0):
+    R = RRCollection(cg.n)
+    R.extend(*RRSampler(cg, model, np.random.default_rng(seed)).sample(count))
+    return R
+
+
+def _within(estimate, mc, n):
+    # both sides are means of many samples; allow 4 standard errors each
+    se = np.sqrt(estimate.stdev ** 2 / estimate.rounds + np.var(mc) / len(mc))
+    return abs(estimate.mean - np.mean(mc)) <= 4 * se + 1e-9
+
+
+@pytest.mark.parametrize('directed', [False, True])
+def test_rr_spread_matches_monte_carlo_ic(directed):
+    g, config = _graph(directed=directed)
+    cg = compile_graph(g, config)
+    seeds = [0, 40, 80]
+    estimate = estimate_spread(cg, 'IC', seeds, 'rr', sets=50000, random_state=0)
+    mc = parallel_simulate(cg, 'IC', seeds, 4000, horizon=None, random_state=0)
+    assert _within(estimate, mc, cg.n)
+
+
+def test_rr_spread_matches_monte_carlo_wc():
+    # weighted cascade is IC with p = 1 / in-degree of the target
+    g, _ = _graph()
+    g = g.to_directed()
+    wc = EdgeWeights.from_graph(g, [1 / g.in_degree(b) for _, b in g.edges()])
+    seeds = [0, 40, 80]
+    estimate = estimate_spread(compile_graph(g, wc), 'WC', seeds, 'rr', sets=50000, random_state=0)
+    mc = parallel_simulate(compile_graph(g, wc), 'IC', seeds, 4000, horizon=None, random_state=0)
+    assert _within(estimate, mc, g.number_of_nodes())
+
+
+def test_every_set_holds_its_root_and_only_nodes_reaching_it():
+    g, config = _graph(60, directed=True)
+    cg = compile_graph(g, config)
+    for model in ('IC', 'WC', 'LT', 'SI'):
+        R = _collection(cg, 500, model)
+        reverse = g.reverse(copy=False)
+        for i in range(0, 500, 50):
+            members = R.members[R.offsets[i]:R.offsets[i + 1]]
+            root = cg.nodes[members[0]]
+            reach = nx.descendants(reverse, root) | {root}
+            assert {cg.nodes[v] for v in members} <= reach
+            assert len(set(members.tolist())) == members.size
+
+
+def test_coverage_and_max_coverage():
+    g, config = _graph(120)
+    cg = compile_graph(g, config)
+    R = _collection(cg, 3000)
+    sets = [set(R.members[R.offsets[i]:R.offsets[i + 1]].tolist()) for i in range(len(R))]
+
+    nodes = [3, 17, 50]
+    assert R.coverage(nodes) == sum(bool(s & set(nodes)) for s in sets) / len(sets)
+    assert R.spread(nodes) == cg.n * R.coverage(nodes)
+
+    # every pick has the largest marginal gain over python sets (ties may go either way)
+    selected, fraction = R.max_coverage(5)
+    covered = set()
+    for v in selected:
+        gains = [sum(1 for i, s in enumerate(sets) if i not in covered and u in s) for u in range(cg.n)]
+        assert gains[v] == max(gains)
+        covered |= {i for i, s in enumerate(sets) if v in s}
+    assert fraction == len(covered) / len(sets)
+
+
+def test_head_and_fill():
+    g, config = _graph(100)
+    cg = compile_graph(g, config)
+    R = RRCollection(cg.n)
+    with ParallelRRSampler(cg, 'IC', 1, chunk_sets=256) as sampler:
+        R.fill(1000, sampler)
+        R.fill(500, sampler)
+    assert len(R) == 1000
+    head = R.head(300)
+    assert len(head) == 300
+    assert np.array_equal(head.members, R.members[:R.offsets[300]])
+
+
+def test_parallel_sampler_is_deterministic_across_jobs():
+    g, config = _graph(200)
+    cg = compile_graph(g, config)
+    draws = []
+    for n_jobs in (1, 2):
+        with ParallelRRSampler(cg, 'IC', 3, n_jobs=n_jobs, chunk_sets=500) as sampler:
+            draws.append(sampler.sample(1700) + sampler.sample(800))
+    for a, b in zip(*draws):
+        assert np.array_equal(a, b)
+
+
+def test_sets_of_follows_appended_sets():
+    g, config = _graph(100)
+    cg = compile_graph(g, config)
+    sampler = RRSampler(cg, 'IC', np.random.default_rng(4))
+    R = RRCollection(cg.n)
+    R.extend(*sampler.sample(200))
+    for batch in (3, 1, 50, 400, 7):
+        R.sets_of(0)
+        R.extend(*sampler.sample(batch))
+        for v in (0, 5, 99):
+            expected = [i for i in range(len(R)) if v in R.members[R.offsets[i]:R.offsets[i + 1]]]
+            assert R.sets_of(v).tolist() == expected
+    # max_coverage still sees every set
+    assert np.array_equal(np.diff(R.index[0]), R.node_counts())
+
+
+def test_max_coverage_upper_bound_brackets_the_optimum():
+    g, config = _graph(14, seed=3)
+    cg = compile_graph(g, config)
+    R = _collection(cg, 400, seed=3)
+    k = 3
+    selected, greedy, upper = R.max_coverage(k, upper_bound=True)
+    assert (selected, greedy) == R.max_coverage(k)
+    optimum = max(R.coverage(list(nodes)) for nodes in itertools.combinations(range(cg.n), k))
+    # greedy <= optimum <= bound, and greedy is within 1 - 1/e of the bound
+    assert greedy <= optimum <= upper + 1e-12
+    assert greedy >= (1 - 1 / math.e) * upper - 1e-12
+
+
+@pytest.mark.parametrize('epsilon', [0.1, 0.2])
+def test_opimc_certifies_its_ratio(epsilon):
+    g = nx.connected_watts_strogatz_graph(60, 4, 0.1, seed=0)
+    config = EdgeWeights.from_graph(g, np.full(g.number_of_edges(), 0.2))
+    stats = SamplingStats()
+    seeds, ratio = OPIMC(g, config, 3, epsilon=epsilon, random_state=0, stats=stats)
+    assert len(set(seeds)) == 3 and set(seeds) <= set(g.nodes())
+    assert 0 < ratio <= 1
+    assert ratio >= 1 - 1 / math.e - epsilon
+    assert stats.phases
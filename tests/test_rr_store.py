@@ -0,0 +1,116 @@
+import os
+
+import networkx as nx
+import numpy as np
+
+from xflow.diffusion.engine import compile_graph
+from xflow.diffusion.weights import EdgeWeights
+from xflow.method.rr import ParallelRRSampler, SamplingStats
+from xflow.method.rr_store import RRStore, rr_pool
+from xflow.IM.IM_baselines import IMM
+
+
+def _graph(p=0.1):
+    g = nx.connected_watts_strogatz_graph(300, 6, 0.2, seed=0)
+    return g, EdgeWeights.from_graph(g, np.full(g.number_of_edges(), p))
+
+
+def test_reopen_and_grow(tmp_path):
+    g, config = _graph()
+    cg = compile_graph(g, config)
+    store = RRStore(str(tmp_path), cg, 'IC', 3, chunk_sets=1000)
+    store.fill(2500)
+    assert len(store) == 3000
+
+    again = RRStore(str(tmp_path), cg, 'IC', 3, chunk_sets=1000)
+    assert len(again) == 3000
+    assert np.array_equal(again.members, store.members)
+    again.fill(5000)
+
+    # grown in two steps, the pool is the one drawn in one go
+    with ParallelRRSampler(cg, 'IC', 3, chunk_sets=1000) as sampler:
+        offsets, members = sampler.sample(5000)
+    assert np.array_equal(again.offsets, offsets)
+    assert np.array_equal(again.members, members)
+
+
+def test_interrupted_append_is_ignored(tmp_path):
+    g, config = _graph()
+    cg = compile_graph(g, config)
+    store = RRStore(str(tmp_path), cg, 'IC', 0, chunk_sets=500)
+    store.fill(1000)
+    expected = np.array(store.members)
+
+    # bytes written past the sizes meta.json records
+    with open(os.path.join(store.path, 'members.bin'), 'ab') as f:
+        f.write(np.arange(77, dtype=np.int32).tobytes())
+    reopened = RRStore(str(tmp_path), cg, 'IC', 0, chunk_sets=500)
+    assert np.array_equal(reopened.members, expected)
+    reopened.fill(1500)
+    assert np.array_equal(reopened.members[:expected.size], expected)
+    assert os.path.getsize(os.path.join(store.path, 'members.bin')) == reopened.size * 4
+
+
+def test_files_are_unmapped_while_appending(tmp_path, monkeypatch):
+    g, config = _graph()
+    store = RRStore(str(tmp_path), compile_graph(g, config), 'IC', 0, chunk_sets=500)
+    store.fill(500)
+    append = RRStore._append
+
+    def checked(path, at, array):
+        # Windows can not truncate a mapped file
+        assert store._offsets is None and store._members is None
+        append(path, at, array)
+
+    monkeypatch.setattr(RRStore, '_append', staticmethod(checked))
+    store.fill(1000)
+    assert len(store) == 1000 and isinstance(store.members, np.memmap)
+
+
+def test_stores_are_keyed_by_weights_model_and_seed(tmp_path):
+    g, config = _graph()
+    cg = compile_graph(g, config)
+    other = compile_graph(g, _graph(0.2)[1])
+    paths = {RRStore(str(tmp_path), cg, 'IC', 0).path, RRStore(str(tmp_path), cg, 'IC', 1).path,
+             RRStore(str(tmp_path), cg, 'LT', 0).path, RRStore(str(tmp_path), other, 'IC', 0).path}
+    assert len(paths) == 4
+    assert RRStore(str(tmp_path), cg, 'IC', 0).path in paths
+
+
+def test_imm_reuses_the_store(tmp_path):
+    g, config = _graph()
+    first, stats = SamplingStats(), SamplingStats()
+    seeds = IMM(g, config, 5, 'IC', random_state=1, store=str(tmp_path), stats=first)
+    (path,) = os.listdir(str(tmp_path))
+    size = os.path.getsize(os.path.join(str(tmp_path), path, 'members.bin'))
+
+    assert IMM(g, config, 5, 'IC', random_state=1, store=str(tmp_path), stats=stats) == seeds
+    assert stats.sets == first.sets
+    assert os.path.getsize(os.path.join(str(tmp_path), path, 'members.bin')) == size
+
+    # a smaller budget is answered from the same pool
+    IMM(g, config, 2, 'IC', random_state=1, store=str(tmp_path))
+    assert os.listdir(str(tmp_path)) == [path]
+
+
+def test_memory_pool_grows_in_place():
+    g, config = _graph()
+    cg = compile_graph(g, config)
+    pool = rr_pool(cg, 'IC', 1000, random_state=5)
+    members = np.array(pool.members)
+    assert rr_pool(cg, 'IC', 500, random_state=5) is pool
+    rr_pool(cg, 'IC', 3000, random_state=5)
+    assert len(pool) >= 3000
+    assert np.array_equal(pool.members[:members.size], members)
+
+
+def test_effect_ic_rr_returns_mean_and_stdev(tmp_path):
+    from xflow.IM.evaluation import effectIC
+    from xflow.method.rr_store import estimate_spread
+
+    g, config = _graph()
+    seeds = [0, 100, 200]
+    estimate = estimate_spread(compile_graph(g, config), 'IC', seeds, 'rr', 20000, str(tmp_path))
+    assert effectIC(g, config, seeds, method='rr', sets=20000, store=str(tmp_path)) == (estimate.mean,
+                                                                                         estimate.stdev)
+    assert estimate.ci[0] < estimate.mean < estimate.ci[1]
@@ -0,0 +1,76 @@
+import statistics as s
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from xflow.diffusion.IC import IC
+from xflow.diffusion.engine import compile_graph
+from xflow.diffusion.weights import EdgeWeights
+
+
+def _weighted(n, p, seed=0):
+    g = nx.connected_watts_strogatz_graph(n, 6, 0.1, seed=seed)
+    rng = np.random.default_rng(seed)
+    for a, b in g.edges():
+        g[a][b]['weight'] = float(rng.uniform(p / 2, p))
+    return g, EdgeWeights.from_graph(g)
+
+
+def _blocked(g, nodes):
+    # what xflow/IBM/evaluation.py does to measure a blocking set
+    g_block = g.__class__()
+    g_block.add_nodes_from(g)
+    g_block.add_edges_from(g.edges)
+    g_block.remove_nodes_from(nodes)
+    return g_block
+
+
+def test_weights_are_reused_for_their_graph():
+    g, config = _weighted(100, 0.4)
+    assert config.matches(g)
+    assert compile_graph(g, config).weights is config.weights
+
+
+def test_weights_of_a_blocked_graph():
+    g, config = _weighted(100, 0.4)
+    g_block = _blocked(g, range(0, 100, 3))
+    assert not config.matches(g_block)
+
+    cg = compile_graph(g_block, config)
+    assert cg.n == g_block.number_of_nodes()
+    assert len(cg.indices) == 2 * g_block.number_of_edges()
+    A = cg.matrix()
+    for a, b in g_block.edges():
+        assert np.isclose(A[cg.index[a], cg.index[b]], g[a][b]['weight'])
+
+
+def test_blocked_graph_matches_ndlib():
+    g, config = _weighted(150, 0.6)
+    g_block = _blocked(g, range(1, 150, 4))
+    seeds = [0, 50, 100]
+
+    native = IC(g_block, config, seeds, rounds=400, random_state=0)
+    reference = IC(g_block, config, seeds, rounds=400, engine='ndlib')
+    assert abs(s.mean(native) - s.mean(reference)) < 4 * s.stdev(reference) / np.sqrt(400) + 0.5
+    assert s.mean(native) < s.mean(IC(g, config, seeds, rounds=400, random_state=0))
+
+
+def test_edgeless_graph():
+    g, config = _weighted(50, 0.8)
+    g_empty = g.__class__()
+    g_empty.add_nodes_from(g)
+    assert IC(g_empty, config, [0, 1], rounds=20, random_state=0) == [2] * 20
+
+
+@pytest.mark.parametrize('directed', [False, True])
+def test_edges_rewired_in_place(directed):
+    g = nx.DiGraph([(0, 1), (2, 3), (1, 2)]) if directed else nx.Graph([(0, 1), (2, 3), (1, 4)])
+    config = EdgeWeights.from_graph(g, np.arange(1, g.number_of_edges() + 1) / 10)
+    # every degree stays the same
+    g.remove_edges_from([(0, 1), (2, 3)])
+    g.add_edges_from([(0, 3), (2, 1)] if directed else [(0, 2), (1, 3)])
+    assert not config.matches(g)
+    # the weights of the new edges are unknown rather than taken from the old ones
+    with pytest.raises(KeyError):
+        EdgeWeights.from_config(g, config)
@@ -4,35 +4,32 @@ import random
 import ndlib
 import ndlib.models.epidemics as ep
 import ndlib.models.ModelConfig as mc
+from xflow.diffusion.weights import EdgeWeights
 
 from torch_geometric.datasets import Planetoid
 
 def connSW(n, beta=None):
     g = nx.connected_watts_strogatz_graph(n, 10, 0.1)
 
-    config = mc.Configuration()
-
     for a, b in g.edges():
         weight = random.randrange(40,80)
         weight = round(weight / 100, 2)
         if beta:
             weight = beta
         g[a][b]['weight'] = weight
-        config.add_edge_configuration("threshold", (a, b), weight)
 
+    config = EdgeWeights.from_graph(g)
     return g, config
 
 def BA():
     g = nx.barabasi_albert_graph(1000, 5)
 
-    config = mc.Configuration()
-
     for a, b in g.edges():
         weight = random.randrange(40,80)
         weight = round(weight / 100, 2)
         g[a][b]['weight'] = weight
-        config.add_edge_configuration("threshold", (a, b), weight)
 
+    config = EdgeWeights.from_graph(g)
     return g, config
 
 def ER():
@@ -42,14 +39,12 @@ def ER():
     while nx.is_connected(g) == False:
         g = nx.erdos_renyi_graph(5000, 0.002)
 
-    config = mc.Configuration()
-
     for a, b in g.edges():
         weight = random.randrange(40,80)
         weight = round(weight / 100, 2)
-        config.add_edge_configuration("threshold", (a, b), weight)
         g[a][b]['weight'] = weight
 
+    config = EdgeWeights.from_graph(g)
     return g, config
 
 def CiteSeer():
@@ -60,14 +55,12 @@ def CiteSeer():
 
     c = max(nx.connected_components(G), key=len)
     g = G.subgraph(c).copy()
-    config = mc.Configuration()
-
     for a, b in g.edges():
         weight = random.randrange(40,80)
         weight = round(weight / 100, 2)
-        config.add_edge_configuration("threshold", (a, b), weight)
         g[a][b]['weight'] = weight
 
+    config = EdgeWeights.from_graph(g)
     return g, config
 
 def PubMed():
@@ -78,14 +71,12 @@ def PubMed():
 
     c = max(nx.connected_components(G), key=len)
     g = G.subgraph(c).copy()
-    config = mc.Configuration()
-
     for a, b in g.edges():
         weight = random.randrange(40,80)
         weight = round(weight / 100, 2)
-        config.add_edge_configuration("threshold", (a, b), weight)
         g[a][b]['weight'] = weight
 
+    config = EdgeWeights.from_graph(g)
     return g, config
 
 def Cora():
@@ -96,14 +87,12 @@ def Cora():
 
     c = max(nx.connected_components(G), key=len)
     g = G.subgraph(c).copy()
-    config = mc.Configuration()
-
     for a, b in g.edges():
         weight = random.randrange(40,80)
         weight = round(weight / 100, 2)
-        config.add_edge_configuration("threshold", (a, b), weight)
         g[a][b]['weight'] = weight
 
+    config = EdgeWeights.from_graph(g)
     return g, config
 
 def photo():
@@ -114,14 +103,12 @@ def photo():
     G = nx.from_edgelist(edges)
     g = nx.convert_node_labels_to_integers(G, first_label=0, ordering='default', label_attribute=None)
 
-    config = mc.Configuration()
-
     for a, b in g.edges():
         weight = random.randrange(5,20)
         weight = round(weight / 100, 2)
-        config.add_edge_configuration("threshold", (a, b), weight)
         g[a][b]['weight'] = weight
 
+    config = EdgeWeights.from_graph(g)
     return g, config
 
 def coms():
@@ -132,12 +119,10 @@ def coms():
     G = nx.from_edgelist(edges)
     g = nx.convert_node_labels_to_integers(G, first_label=0, ordering='default', label_attribute=None)
 
-    config = mc.Configuration()
-
     for a, b in g.edges():
         weight = random.randrange(5,20)
         weight = round(weight / 100, 2)
-        config.add_edge_configuration("threshold", (a, b), weight)
         g[a][b]['weight'] = weight
 
+    config = EdgeWeights.from_graph(g)
     return g, config
\ No newline at end of file
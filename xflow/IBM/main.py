@@ -14,54 +14,25 @@ print('seeds: ', seeds)
 
 beta = 0.1
 
-for budget in [5, 10, 15, 20, 25, 30]:
+budgets = [5, 10, 15, 20, 25, 30]
 
-    print('budget: ', budget)
+# every method is run once up to the largest budget and returns {budget: selected}
+for name, method in [('greedy', lambda budget: greedySI(g, config, budget, seeds, beta=beta)),
+                     ('eigen', lambda budget: eigen(g, config, budget)),
+                     ('degree', lambda budget: degree(g, config, budget)),
+                     ('sigma', lambda budget: sigma(g, config, budget)),
+                     ('pi', lambda budget: pi(g, config, budget))]:
 
-    # greedy
     start = time.time()
-    selected = greedySI(g, config, budget, seeds, beta=beta)
+    selections = method(budgets)
     end = time.time()
     print('time: ', end - start)
-    print('greedy: ', selected)
-    mean, std = blocking_effect_SI(g, config, seeds, selected, beta=beta)
-    print('blocked: ', mean, '+-', std)
 
-    # eigen
-    start = time.time()
-    selected = eigen(g, config, budget)
-    end = time.time()
-    print('time: ', end - start)
-    print('eigen: ', selected)
-    mean, std = blocking_effect_SI(g, config, seeds, selected, beta=beta)
-    print('blocked: ', mean, '+-', std)
-
-    # degree
-    start = time.time()
-    selected = degree(g, config, budget)
-    end = time.time()
-    print('time: ', end - start)
-    print('degree: ', selected)
-    mean, std = blocking_effect_SI(g, config, seeds, selected, beta=beta)
-    print('blocked: ', mean, '+-', std)
-
-    # sigma
-    start = time.time()
-    selected = sigma(g, config, budget)
-    end = time.time()
-    print('time: ', end - start)
-    print('sigma: ', selected)
-    mean, std = blocking_effect_SI(g, config, seeds, selected, beta=beta)
-    print('blocked: ', mean, '+-', std)
-
-    # pi
-    start = time.time()
-    selected = pi(g, config, budget)
-    end = time.time()
-    print('time: ', end - start)
-    print('pi: ', selected)
-    mean, std = blocking_effect_SI(g, config, seeds, selected, beta=beta)
-    print('blocked: ', mean, '+-', std)
+    for budget, selected in selections.items():
+        print('budget: ', budget)
+        print(name + ': ', selected)
+        mean, std = blocking_effect_SI(g, config, seeds, selected, beta=beta)
+        print('blocked: ', mean, '+-', std)
 
 ####################################################################################################
 
@@ -74,6 +45,8 @@ seeds = random.sample(list(g.nodes()), 10)
 
 print('seeds: ', seeds)
 
+budget = budgets[-1]
+
 for beta in [0.1,0.2,0.3,0.4,0.5]:
     print('beta: ', beta)
 
@@ -8,109 +8,58 @@ from torch_geometric import utils
 import ndlib.models.epidemics as ep
 import ndlib.models.ModelConfig as mc
 import statistics as s
-
-def effectIC(g, config, result):
-
-    input = []
-
-    for i in range(1000):
-
-      g_mid = g.__class__()
-      g_mid.add_nodes_from(g)
-      g_mid.add_edges_from(g.edges)
-
-      model_mid = ep.IndependentCascadesModel(g_mid)
-      config_mid = mc.Configuration()
-      config_mid.add_model_initial_configuration('Infected', result)
-
-      for a, b in g_mid.edges():
-        weight = config.config["edges"]['threshold'][(a, b)]
-        g_mid[a][b]['weight'] = weight
-        config_mid.add_edge_configuration('threshold', (a, b), weight)
-
-      model_mid.set_initial_status(config_mid)
-
-      iterations = model_mid.iteration_bunch(5)
-      trends = model_mid.build_trends(iterations)
-
-      total_no = 0
-
-      for j in range(5):
-        a = iterations[j]['node_count'][1]
-        total_no += a
-
-      input.append(total_no)
+from xflow.diffusion.engine import compile_graph
+from xflow.diffusion.parallel import parallel_simulate
+from xflow.diffusion.estimate import adaptive_spread
+from xflow.method.rr_store import estimate_spread
+
+def effectIC(g, config, result, n_jobs=1, random_state=None, rel_tol=None, abs_tol=None, method='mc', sets=1 << 17,
+             store=None):
+
+    if method == 'rr':
+        # one pass over an RR pool shared by every seed set evaluated on g;
+        # the stdev is that of one RR set (n times its hit indicator) as the
+        # one below is that of one cascade. RR sets measure the spread once
+        # cascades stop, not after the 4 steps below, so do not mix methods
+        # in one comparison
+        estimate = estimate_spread(compile_graph(g, config), 'IC', result, 'rr', sets, store,
+                                   random_state=random_state, n_jobs=n_jobs)
+        return estimate.mean, estimate.stdev
+
+    if rel_tol is not None or abs_tol is not None:
+        input = adaptive_spread(compile_graph(g, config), 'IC', result, rel_tol=rel_tol, abs_tol=abs_tol,
+                                max_rounds=1000, random_state=random_state, n_jobs=n_jobs).results
+    else:
+        input = parallel_simulate(compile_graph(g, config), 'IC', result, rounds=1000,
+                                  random_state=random_state, n_jobs=n_jobs)
 
     e = s.mean(input)
     v = s.stdev(input)
 
     return e,v
 
-def effectLT(g, config, result):
-
-    input = []
-
-    for i in range(1000):
-
-      g_mid = g.__class__()
-      g_mid.add_nodes_from(g)
-      g_mid.add_edges_from(g.edges)
+def effectLT(g, config, result, n_jobs=1, random_state=None, rel_tol=None, abs_tol=None):
 
-      model_mid = ep.ThresholdModel(g_mid)
-      config_mid = mc.Configuration()
-      config_mid.add_model_initial_configuration('Infected', result)
-
-      for a, b in g_mid.edges():
-        weight = config.config["edges"]['threshold'][(a, b)]
-        g_mid[a][b]['weight'] = weight
-        config_mid.add_edge_configuration('threshold', (a, b), weight)
-
-      for i in g.nodes():
-          threshold = random.randrange(1, 20)
-          threshold = round(threshold / 100, 2)
-          config_mid.add_node_configuration("threshold", i, threshold)
-
-      model_mid.set_initial_status(config_mid)
-
-      iterations = model_mid.iteration_bunch(5)
-      trends = model_mid.build_trends(iterations)
-
-      total_no = iterations[4]['node_count'][1]
-      input.append(total_no)
+    if rel_tol is not None or abs_tol is not None:
+        input = adaptive_spread(compile_graph(g, config), 'LT', result, rel_tol=rel_tol, abs_tol=abs_tol,
+                                max_rounds=1000, random_state=random_state, n_jobs=n_jobs).results
+    else:
+        input = parallel_simulate(compile_graph(g, config), 'LT', result, rounds=1000,
+                                  random_state=random_state, n_jobs=n_jobs)
 
     e = s.mean(input)
     v = s.stdev((input))
 
     return e,v
 
-def effectSI(g, config, result, beta=0.01):
-
-    input = []
-
-    for i in range(1000):
-
-        g_mid = g.__class__()
-        g_mid.add_nodes_from(g)
-        g_mid.add_edges_from(g.edges)
-
-        model_mid = ep.SIModel(g_mid)
-        config_mid = mc.Configuration()
-        config_mid.add_model_initial_configuration('Infected', result)
-        config_mid.add_model_parameter('beta', beta)  # set beta parameter
-
-
-        for a, b in g_mid.edges():
-            weight = config.config["edges"]['threshold'][(a, b)]
-            g_mid[a][b]['weight'] = weight
-            config_mid.add_edge_configuration('threshold', (a, b), weight)
-
-        model_mid.set_initial_status(config_mid)
-
-        iterations = model_mid.iteration_bunch(5)
-        trends = model_mid.build_trends(iterations)
+def effectSI(g, config, result, beta=0.01, n_jobs=1, random_state=None, rel_tol=None, abs_tol=None):
 
-        total_no = iterations[4]['node_count'][1]
-        input.append(total_no)
+    if rel_tol is not None or abs_tol is not None:
+        input = adaptive_spread(compile_graph(g, config), 'SI', result, beta=beta, rel_tol=rel_tol, abs_tol=abs_tol,
+                                max_rounds=1000, random_state=random_state, n_jobs=n_jobs).results
+    else:
+        input = parallel_simulate(compile_graph(g, config), 'SI', result, rounds=1000, beta=beta,
+                                  random_state=random_state, n_jobs=n_jobs)
 
     e = s.mean(input)
     v = s.stdev((input))
@@ -5,6 +5,14 @@ from graph_generation import Cora, CiteSeer, PubMed, connSW, ER, coms, photo
 from IM_baselines import eigen, degree, pi, sigma, greedy, celf, celfpp, IMRank, RIS
 from evaluation import effectSI
 
+def report(g, config, set, beta):
+    # a list of budgets gives {budget: seeds}
+    sets = set if isinstance(set, dict) else {len(set): set}
+    for budget, seeds in sets.items():
+        ie,var = effectSI(g, config, seeds, beta)
+        print('budget', budget, 'seeds:', seeds)
+        print('budget', budget, 'IE:', ie, " +_ ", var)
+
 def analyze(seed, beta, size):
     g, config = connSW(size, beta)
     print('beta', beta)
@@ -17,8 +25,7 @@ def analyze(seed, beta, size):
     set = pi(g,config,seed)
     end = time()
     print("time: ", end-start)
-    ie,var = effectSI(g, config, set, beta)
-    print('IE:', ie, " +_ ", var)
+    report(g, config, set, beta)
 
     # print('------------------------------------------------')
     # print('degree')
@@ -26,8 +33,7 @@ def analyze(seed, beta, size):
     # set = degree(g,config,seed)
     # end = time()
     # print('time: ', end - start)
-    # ie,var = effectSI(g, config, set, beta)
-    # print('IE:', ie, " +_ ", var)
+    # report(g, config, set, beta)
 
     # print('------------------------------------------------')
     # print('eigen-centrality')
@@ -35,8 +41,7 @@ def analyze(seed, beta, size):
     # set = eigen(g, config, seed)
     # end = time()
     # print('time: ', end - start)
-    # ie,var = effectSI(g, config, set, beta)
-    # print('IE:', ie, " +_ ", var)
+    # report(g, config, set, beta)
 
     
 #     print('------------------------------------------------')
@@ -45,8 +50,7 @@ def analyze(seed, beta, size):
 #     set = RIS(g, config, seed)
 #     end = time()
 #     print('time: ', end - start)
-#     ie,var = effectSI(g, config, set, beta)
-#     print('IE:', ie, " +_ ", var)
+#     report(g, config, set, beta)
 
     # print('------------------------------------------------')
     # print('celfpp')
@@ -54,8 +58,7 @@ def analyze(seed, beta, size):
     # set = celfpp(g,config,seed, rounds=100, model='SI', beta=beta)
     # end = time()
     # print('time: ', end - start)
-    # ie,var = effectSI(g, config, set, beta)
-    # print('IE:', ie, " +_ ", var)
+    # report(g, config, set, beta)
 
     # print('------------------------------------------------')
     # print('IMRank')
@@ -63,8 +66,7 @@ def analyze(seed, beta, size):
     # set = IMRank(g,config,seed)
     # end = time()
     # print('time: ', end - start)
-    # ie,var = effectSI(g, config, set, beta)
-    # print('IE:', ie, " +_ ", var)
+    # report(g, config, set, beta)
 
     # print('------------------------------------------------')
     # print('IMM')
@@ -72,18 +74,13 @@ def analyze(seed, beta, size):
     # set = IMM(g, config, seed, rounds=100, model='SI', beta=beta)
     # end = time()
     # print('time: ', end - start)
-    # ie,var = effectSI(g, config, set, beta)
-    # print('IE:', ie, " +_ ", var)
+    # report(g, config, set, beta)
 
 
 # for chart 1
 print("seed = [5, 10, 15, 20, 25, 30];  beta = 0.1; size = 1000")
-analyze(5, 0.1, 1000)
-analyze(10, 0.1, 1000)
-analyze(15, 0.1, 1000)
-analyze(20, 0.1, 1000)
-analyze(25, 0.1, 1000)
-analyze(30, 0.1, 1000)
+# one run up to the largest budget gives every smaller one
+analyze([5, 10, 15, 20, 25, 30], 0.1, 1000)
 
 # for chart 2
 print("seed = 5; beta = [0.1, 0.2, 0.3, 0.4, 0.5]; size = 1000")
@@ -4,6 +4,7 @@ import requests
 import random
 import tarfile
 import ndlib.models.ModelConfig as mc
+from xflow.diffusion.weights import EdgeWeights
 
 def create_folder(folder_name):
     if not os.path.exists(folder_name):
@@ -34,12 +35,11 @@ def extract_tar_bz2(filename, extract_path):
         print(f"{extract_path} already exists.")
 
 def add_edge_weights(G, min_weight, max_weight):
-    config = mc.Configuration()
     for a, b in G.edges():
         weight = random.uniform(min_weight, max_weight)
         weight = round(weight, 2)
-        config.add_edge_configuration("threshold", (a, b), weight)
         G[a][b]['weight'] = weight
+    config = EdgeWeights.from_graph(G)
     return G, config
 
 def load_graph(filename):
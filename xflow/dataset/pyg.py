@@ -5,6 +5,7 @@ import random
 import ndlib
 import ndlib.models.epidemics as ep
 import ndlib.models.ModelConfig as mc
+from xflow.diffusion.weights import EdgeWeights
 import torch_geometric
 
 from torch_geometric.datasets import Planetoid, EmailEUCore, MyketDataset, BitcoinOTC, PolBlogs, KarateClub
@@ -44,12 +45,11 @@ def convert_temporal_to_graph_attr(data):
     return G
 
 def add_edge_weights(G, min_weight, max_weight):
-    config = mc.Configuration()
     for a, b in G.edges():
         weight = random.uniform(min_weight, max_weight)
         weight = round(weight, 2)
-        config.add_edge_configuration("threshold", (a, b), weight)
         G[a][b]['weight'] = weight
+    config = EdgeWeights.from_graph(G)
     return G, config
     
 def CiteSeer():
@@ -60,14 +60,13 @@ def CiteSeer():
 
     c = max(nx.connected_components(G), key=len)
     g = G.subgraph(c).copy()
-    config = mc.Configuration()
 
     for a, b in g.edges():
         weight = random.randrange(40,80)
         weight = round(weight / 100, 2)
-        config.add_edge_configuration("threshold", (a, b), weight)
         g[a][b]['weight'] = weight
 
+    config = EdgeWeights.from_graph(g)
     return g, config
 
 def PubMed():
@@ -78,14 +77,13 @@ def PubMed():
 
     c = max(nx.connected_components(G), key=len)
     g = G.subgraph(c).copy()
-    config = mc.Configuration()
 
     for a, b in g.edges():
         weight = random.randrange(40,80)
         weight = round(weight / 100, 2)
-        config.add_edge_configuration("threshold", (a, b), weight)
         g[a][b]['weight'] = weight
 
+    config = EdgeWeights.from_graph(g)
     return g, config
 
 def Cora():
@@ -96,14 +94,13 @@ def Cora():
 
     c = max(nx.connected_components(G), key=len)
     g = G.subgraph(c).copy()
-    config = mc.Configuration()
 
     for a, b in g.edges():
         weight = random.randrange(40,80)
         weight = round(weight / 100, 2)
-        config.add_edge_configuration("threshold", (a, b), weight)
         g[a][b]['weight'] = weight
 
+    config = EdgeWeights.from_graph(g)
     return g, config
 
 def photo():
@@ -113,14 +110,12 @@ def photo():
     G = nx.from_edgelist(edges)
     g = nx.convert_node_labels_to_integers(G, first_label=0, ordering='default', label_attribute=None)
 
-    config = mc.Configuration()
-
     for a, b in g.edges():
         weight = random.randrange(5,20)
         weight = round(weight / 100, 2)
-        config.add_edge_configuration("threshold", (a, b), weight)
         g[a][b]['weight'] = weight
 
+    config = EdgeWeights.from_graph(g)
     return g, config
 
 def coms():
@@ -130,14 +125,12 @@ def coms():
     G = nx.from_edgelist(edges)
     g = nx.convert_node_labels_to_integers(G, first_label=0, ordering='default', label_attribute=None)
 
-    config = mc.Configuration()
-
     for a, b in g.edges():
         weight = random.randrange(5,20)
         weight = round(weight / 100, 2)
-        config.add_edge_configuration("threshold", (a, b), weight)
         g[a][b]['weight'] = weight
 
+    config = EdgeWeights.from_graph(g)
     return g, config
 
 def email_eu_core():
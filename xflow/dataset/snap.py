@@ -3,6 +3,7 @@ import networkx as nx
 import requests
 import random
 import ndlib.models.ModelConfig as mc
+from xflow.diffusion.weights import EdgeWeights
 import gzip
 
 # TODO add CAIDA 
@@ -30,12 +31,11 @@ def check_and_download(url, filename):
         download_snap_dataset(url, filename)
 
 def add_edge_weights(G, min_weight, max_weight):
-    config = mc.Configuration()
     for a, b in G.edges():
         weight = random.uniform(min_weight, max_weight)
         weight = round(weight, 2)
-        config.add_edge_configuration("threshold", (a, b), weight)
         G[a][b]['weight'] = weight
+    config = EdgeWeights.from_graph(G)
     return G, config
 
 def load_graph(filename):
@@ -2,10 +2,23 @@ import torch_geometric.datasets as ds
 import random
 import ndlib.models.epidemics as ep
 import ndlib.models.ModelConfig as mc
+from .engine import STEPS, check_horizon, compile_graph
+from .parallel import parallel_simulate
+from .estimate import adaptive_spread
 
 
 # diffusion models
-def IC(g, config, seed, rounds=100):
+def IC(g, config, seed, rounds=100, engine='native', n_jobs=1, random_state=None,
+       rel_tol=None, abs_tol=None, horizon=STEPS):
+    if engine == 'native':
+        cg = compile_graph(g, config)
+        if rel_tol is not None or abs_tol is not None:
+            # rounds becomes the cap of an adaptive run that stops at the requested precision
+            return adaptive_spread(cg, 'IC', seed, rel_tol=rel_tol, abs_tol=abs_tol, max_rounds=rounds,
+                                   horizon=horizon, random_state=random_state, n_jobs=n_jobs).results
+        return parallel_simulate(cg, 'IC', seed, rounds, horizon, random_state=random_state, n_jobs=n_jobs)
+
+    steps = check_horizon(horizon)
     result = []
 
     for iter in range(rounds):
@@ -21,13 +34,15 @@ def IC(g, config, seed, rounds=100):
 
         model_temp.set_initial_status(config_temp)
 
-        iterations = model_temp.iteration_bunch(5)
-
-        total_no = 0
-
-        for j in range(5):
-            a = iterations[j]['node_count'][1]
-            total_no += a
+        # nodes are infected for exactly one iteration, so the cascade is over
+        # once an iteration leaves none infected
+        iteration = model_temp.iteration()
+        total_no = iteration['node_count'][1]
+        t = 0
+        while iteration['node_count'][1] and (steps is None or t < steps):
+            iteration = model_temp.iteration()
+            total_no += iteration['node_count'][1]
+            t += 1
 
         result.append(total_no)
 
@@ -2,9 +2,22 @@ import torch_geometric.datasets as ds
 import random
 import ndlib.models.epidemics as ep
 import ndlib.models.ModelConfig as mc
-
-
-def LT(g, config, seed, rounds=100):
+from .engine import STEPS, check_horizon, compile_graph
+from .parallel import parallel_simulate
+from .estimate import adaptive_spread
+
+
+def LT(g, config, seed, rounds=100, engine='native', n_jobs=1, random_state=None,
+       rel_tol=None, abs_tol=None, horizon=STEPS):
+    if engine == 'native':
+        cg = compile_graph(g, config)
+        if rel_tol is not None or abs_tol is not None:
+            # rounds becomes the cap of an adaptive run that stops at the requested precision
+            return adaptive_spread(cg, 'LT', seed, rel_tol=rel_tol, abs_tol=abs_tol, max_rounds=rounds,
+                                   horizon=horizon, random_state=random_state, n_jobs=n_jobs).results
+        return parallel_simulate(cg, 'LT', seed, rounds, horizon, random_state=random_state, n_jobs=n_jobs)
+
+    steps = check_horizon(horizon)
     result = []
 
     for iter in range(rounds):
@@ -25,9 +38,16 @@ def LT(g, config, seed, rounds=100):
 
         model_temp.set_initial_status(config_temp)
 
-        iterations = model_temp.iteration_bunch(5)
+        # thresholds are fixed, so an iteration that activates nobody is the last change
+        iteration = model_temp.iteration()
+        t = 0
+        while steps is None or t < steps:
+            iteration = model_temp.iteration()
+            t += 1
+            if not iteration['status']:
+                break
 
-        total_no = iterations[4]['node_count'][1]
+        total_no = iteration['node_count'][1]
 
         result.append(total_no)
 
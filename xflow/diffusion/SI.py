@@ -2,10 +2,24 @@ import torch_geometric.datasets as ds
 import random
 import ndlib.models.epidemics as ep
 import ndlib.models.ModelConfig as mc
+from .engine import STEPS, check_horizon, compile_graph
+from .parallel import parallel_simulate
+from .estimate import adaptive_spread
 
 
-def SI(g, config, seed, rounds=100, beta=0.1):
+def SI(g, config, seed, rounds=100, beta=0.1, engine='native', n_jobs=1, random_state=None,
+       rel_tol=None, abs_tol=None, horizon=STEPS):
 
+    if engine == 'native':
+        cg = compile_graph(g, config)
+        if rel_tol is not None or abs_tol is not None:
+            # rounds becomes the cap of an adaptive run that stops at the requested precision
+            return adaptive_spread(cg, 'SI', seed, beta=beta, rel_tol=rel_tol, abs_tol=abs_tol, max_rounds=rounds,
+                                   horizon=horizon, random_state=random_state, n_jobs=n_jobs).results
+        return parallel_simulate(cg, 'SI', seed, rounds, horizon, beta=beta, random_state=random_state,
+                                 n_jobs=n_jobs)
+
+    steps = check_horizon(horizon)
     result = []
 
     for iter in range(rounds):
@@ -21,8 +35,22 @@ def SI(g, config, seed, rounds=100, beta=0.1):
 
         model_temp.set_initial_status(config_temp)
 
-        iterations = model_temp.iteration_bunch(5)
+        iteration = model_temp.iteration()
+        t = 0
+        while (steps is None or t < steps) and beta > 0 and not _quiescent(g, model_temp.status):
+            iteration = model_temp.iteration()
+            t += 1
 
-        result.append(iterations[4]['node_count'][1])
+        result.append(iteration['node_count'][1])
 
     return result
+
+
+def _quiescent(g, status):
+    # no infected node has a susceptible neighbour left to infect
+    for a, b in g.edges():
+        if status[a] + status[b] == 1:
+            if g.is_directed() and status[a] == 0:
+                continue
+            return False
+    return True
@@ -0,0 +1,13 @@
+from .engine import compile_graph
+from .epidemics import simulate_epidemic
+
+
+def SIR(g, config, seed, rounds=100, beta=0.1, gamma=0.01, horizon=None, random_state=None, nodes=False):
+    """Run ``rounds`` SIR epidemics from the infected nodes ``seed``.
+
+    Returns the (rounds, T, 3) susceptible / infected / removed counts after
+    every step, by default until the epidemic is over, plus the node statuses
+    with ``nodes``. ``config`` may be None, edge thresholds are not used.
+    """
+    cg = compile_graph(g, config)
+    return simulate_epidemic(cg, 'SIR', seed, rounds, horizon, beta, gamma, rng=random_state, nodes=nodes)
@@ -0,0 +1,14 @@
+from .engine import compile_graph
+from .epidemics import simulate_epidemic
+
+
+def SIS(g, config, seed, rounds=100, beta=0.1, lamda=0.01, horizon=100, random_state=None, nodes=False):
+    """Run ``rounds`` SIS epidemics from the infected nodes ``seed``.
+
+    ``lamda`` is the recovery rate (ndlib's 'lambda'). Returns the
+    (rounds, T, 2) susceptible / infected counts after every step, plus the
+    node statuses with ``nodes``. ``config`` may be None, edge thresholds are
+    not used.
+    """
+    cg = compile_graph(g, config)
+    return simulate_epidemic(cg, 'SIS', seed, rounds, horizon, beta, lamda, rng=random_state, nodes=nodes)
@@ -1,3 +1,9 @@
 from .SI import SI
 from .IC import IC
 from .LT import LT
+from .worlds import LiveEdgeWorlds
+from .shared import SharedGraph
+from .cache import SpreadCache
+from .SIR import SIR
+from .SIS import SIS
+from .epidemics import iteration_bunch
@@ -0,0 +1,152 @@
+import hashlib
+import sqlite3
+from collections import OrderedDict
+import numpy as np
+
+# Memoized spread estimates.
+#
+# Greedy selection scores the same seed sets over and over: every singleton in
+# its first round, each CELF re-evaluation of an unchanged set, and again in
+# every budget and repeat of an experiment. A SpreadCache keeps the mean
+# spread of each estimate under a digest of (graph structure, edge weights,
+# model, parameters, seed set), in a size-bounded LRU in memory and, with a
+# path, in an SQLite file shared by later runs.
+
+
+def fingerprint(cg):
+    """(structure, weights) digests of a CompiledGraph, computed once per graph.
+
+    Weights changed in place after the first call are not noticed.
+    """
+    fp = getattr(cg, '_fingerprint', None)
+    if fp is None:
+        structure = hashlib.blake2b(digest_size=16)
+        structure.update(repr((cg.directed, list(cg.nodes))).encode())
+        structure.update(np.ascontiguousarray(cg.indptr, dtype=np.int64).tobytes())
+        structure.update(np.ascontiguousarray(cg.indices, dtype=np.int64).tobytes())
+        weights = hashlib.blake2b(np.ascontiguousarray(cg.weights).tobytes(), digest_size=16)
+        fp = (structure.hexdigest(), weights.hexdigest())
+        cg._fingerprint = fp
+    return fp
+
+
+def _canonical(value):
+    # sets of labels compare by content, whatever their order
+    if isinstance(value, (set, frozenset)):
+        return sorted(map(repr, value))
+    return repr(value)
+
+
+class SpreadCache:
+    """Size-bounded LRU of mean spread estimates keyed by seed set.
+
+    Parameters
+    ----------
+    maxsize : int
+        estimates kept in memory
+    path : str or None
+        SQLite file to also keep every estimate in, so that later runs
+        (and other processes) reuse them
+
+    Attributes
+    ----------
+    hits, misses : int
+        lookups answered from the cache and estimates that had to be computed
+    """
+
+    def __init__(self, maxsize=1 << 16, path=None):
+        self.maxsize = maxsize
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path)
+            self._db.execute("CREATE TABLE IF NOT EXISTS spread (key TEXT PRIMARY KEY, value REAL)")
+
+    def key(self, cg, model, seeds, **params):
+        """Digest identifying the estimate of ``seeds`` on ``cg`` under ``model`` and ``params``."""
+        graph, weights = fingerprint(cg)
+        params = sorted((name, _canonical(value)) for name, value in params.items())
+        text = repr((graph, weights, model.upper(), params, _canonical(frozenset(seeds))))
+        return hashlib.blake2b(text.encode(), digest_size=20).hexdigest()
+
+    def get(self, key, default=None):
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+        if self._db is not None:
+            row = self._db.execute("SELECT value FROM spread WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._remember(key, row[0])
+                return row[0]
+        return default
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self._store(key, value)
+        if self._db is not None:
+            self._db.commit()
+
+    def __len__(self):
+        return len(self._memory)
+
+    def _store(self, key, value):
+        self._remember(key, float(value))
+        if self._db is not None:
+            self._db.execute("INSERT OR REPLACE INTO spread VALUES (?, ?)", (key, float(value)))
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def lookup(self, cg, model, seed_sets, score, **params):
+        """Mean spread of every seed set, computing the missing ones with ``score``.
+
+        ``score`` gets the list of seed sets not in the cache and returns their
+        mean spreads in the same order.
+        """
+        keys = [self.key(cg, model, seeds, **params) for seeds in seed_sets]
+        values = [self.get(key) for key in keys]
+        missing = [i for i, value in enumerate(values) if value is None]
+        self.hits += len(values) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            for i, value in zip(missing, score([seed_sets[i] for i in missing])):
+                values[i] = float(value)
+                self._store(keys[i], values[i])
+            if self._db is not None:
+                self._db.commit()
+        return values
+
+    def clear(self):
+        """Drop every estimate, from the disk backend too."""
+        self._memory.clear()
+        if self._db is not None:
+            self._db.execute("DELETE FROM spread")
+            self._db.commit()
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __repr__(self):
+        return f"SpreadCache(size={len(self)}, maxsize={self.maxsize}, hits={self.hits}, misses={self.misses})"
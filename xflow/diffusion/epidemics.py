@@ -0,0 +1,193 @@
+import numpy as np
+
+from .engine import _steps, check_horizon, check_random_state, compile_graph
+
+# Compartmental epidemics (SI / SIS / SIR) on the array engine.
+#
+# The status of a batch of worlds is one flat (worlds x nodes) uint8 array
+# holding the ndlib status codes, advanced synchronously like ndlib does:
+# every infected node infects each susceptible out-neighbour with p = beta
+# (the same as ndlib's 1 - (1 - beta)^k for a node with k infected
+# in-neighbours) and recovers with p = gamma, back to susceptible under SIS
+# and to removed under SIR. Only the infected positions are expanded, so
+# worlds in which the epidemic is over cost nothing.
+#
+# Runs report the size of every compartment after every step as a compact
+# (rounds, steps + 1, compartments) array, and optionally the node statuses.
+
+SUSCEPTIBLE, INFECTED, REMOVED = 0, 1, 2
+
+COMPARTMENTS = {'SI': 2, 'SIS': 2, 'SIR': 3}
+
+
+def _recovered_status(model):
+    return {'SI': None, 'SIS': SUSCEPTIBLE, 'SIR': REMOVED}[model]
+
+
+def _check_model(model):
+    model = model.upper()
+    if model not in COMPARTMENTS:
+        raise ValueError(f"Unknown epidemic model: {model}")
+    return model
+
+
+def epidemic_batch(cg, model, state, worlds, steps, beta=0.1, gamma=0.01, rng=None, record=False):
+    """Advance the flat statuses ``state`` of ``worlds`` worlds by up to ``steps`` steps in place.
+
+    Returns the (worlds, T, compartments) counts after each of the T - 1 steps
+    run (plus the initial one), and with ``record`` the (worlds, T, n) statuses.
+    The run stops early once no world can change any more; steps=None runs
+    until then.
+    """
+    rng = check_random_state(rng)
+    model = _check_model(model)
+    n, k = cg.n, COMPARTMENTS[model]
+    recovered_to = _recovered_status(model)
+    recovers = recovered_to is not None and gamma > 0
+
+    infected = np.flatnonzero(state == INFECTED)
+    counts = np.stack([(state.reshape(worlds, n) == c).sum(axis=1) for c in range(k)], axis=1)
+    history = [counts.copy()]
+    states = [state.reshape(worlds, n).copy()] if record else None
+
+    for _ in _steps(steps):
+        if infected.size == 0:
+            break
+        _, targets = cg.expand(infected)
+        targets = targets[state[targets] == SUSCEPTIBLE]
+        if targets.size == 0 and not recovers:
+            break
+        new = np.unique(targets[rng.random(targets.size) < beta])
+        if recovers:
+            done = rng.random(infected.size) < gamma
+            state[infected[done]] = recovered_to
+            left = np.bincount(infected[done] // n, minlength=worlds)
+            counts[:, INFECTED] -= left
+            counts[:, recovered_to] += left
+            infected = infected[~done]
+        state[new] = INFECTED
+        joined = np.bincount(new // n, minlength=worlds)
+        counts[:, SUSCEPTIBLE] -= joined
+        counts[:, INFECTED] += joined
+        infected = np.union1d(infected, new)
+
+        history.append(counts.copy())
+        if record:
+            states.append(state.reshape(worlds, n).copy())
+
+    history = np.stack(history, axis=1)
+    if record:
+        return history, np.stack(states, axis=1)
+    return history
+
+
+def _pad(arrays, length):
+    # repeat the final step of runs that ended early
+    return [np.pad(a, [(0, 0), (0, length - a.shape[1])] + [(0, 0)] * (a.ndim - 2), mode='edge')
+            for a in arrays]
+
+
+def simulate_epidemic(cg, model, seeds, rounds=100, horizon=100, beta=0.1, gamma=0.01, rng=None,
+                      batch_size=None, nodes=False):
+    """Run ``rounds`` independent SI / SIS / SIR epidemics from ``seeds``.
+
+    Parameters
+    ----------
+    cg : CompiledGraph
+    model : str
+        'SI', 'SIS' or 'SIR'
+    seeds : iterable
+        initially infected node labels
+    horizon : int, None or 'quiescent'
+        steps per round, or None / 'quiescent' to run until no world can change
+    beta : float
+        infection rate
+    gamma : float
+        recovery rate (ndlib's lambda for SIS), unused by SI
+    rng : None, int or numpy Generator
+    batch_size : int or None
+        worlds advanced together
+    nodes : bool
+        also return the status of every node after every step
+
+    Returns
+    -------
+    counts : ndarray, shape (rounds, T, compartments)
+        size of each compartment (susceptible, infected[, removed]) after
+        every step, T - 1 steps past the initial state; rounds that ended
+        early repeat their final counts
+    states : ndarray, shape (rounds, T, n), uint8
+        only with ``nodes``; columns follow ``cg.nodes``
+    """
+    model = _check_model(model)
+    steps = check_horizon(horizon)
+    rng = check_random_state(rng)
+    seeds = cg.to_index(seeds)
+    if batch_size is None:
+        batch_size = max(1, (1 << 24) // max(cg.n * (steps + 1 if nodes and steps else 1), 1))
+
+    counts, states = [], []
+    for start in range(0, rounds, batch_size):
+        worlds = min(batch_size, rounds - start)
+        state = np.zeros(worlds * cg.n, dtype=np.uint8)
+        state[(np.arange(worlds)[:, None] * cg.n + seeds).ravel()] = INFECTED
+        result = epidemic_batch(cg, model, state, worlds, steps, beta, gamma, rng, record=nodes)
+        if nodes:
+            counts.append(result[0])
+            states.append(result[1])
+        else:
+            counts.append(result)
+
+    length = max(c.shape[1] for c in counts) if steps is None else steps + 1
+    counts = np.concatenate(_pad(counts, length))
+    if nodes:
+        return counts, np.concatenate(_pad(states, length))
+    return counts
+
+
+def iteration_bunch(model, bunch_size, node_status=True, rng=None):
+    """Run an ndlib SI / SIS / SIR model on the array engine.
+
+    Drop-in for ``model.iteration_bunch(bunch_size, node_status)``: it returns
+    the same list of iteration dicts and leaves the model's status and
+    iteration counter where ndlib would, so ndlib and native bunches can be
+    mixed. Other models fall back to ndlib.
+    """
+    name = getattr(model, 'name', None)
+    params = model.params['model']
+    if name not in COMPARTMENTS or params.get('tp_rate', 1) != 1:
+        return model.iteration_bunch(bunch_size, node_status)
+
+    model.clean_initial_status(model.available_statuses.values())
+    cg = compile_graph(model.graph.graph, None)
+    statuses = list(model.available_statuses.values())
+    state = np.fromiter((model.status[v] for v in cg.nodes), dtype=np.uint8, count=cg.n)
+
+    iterations = []
+    if model.actual_iteration == 0 and bunch_size > 0:
+        count = {s: int(c) for s, c in zip(statuses, np.bincount(state, minlength=len(statuses)))}
+        iterations.append({
+            "iteration": 0,
+            "status": dict(zip(cg.nodes, state.tolist())) if node_status else {},
+            "node_count": count,
+            "status_delta": {s: 0 for s in statuses},
+        })
+        model.actual_iteration = 1
+        bunch_size -= 1
+
+    gamma = params.get('gamma', params.get('lambda', 0.0))
+    counts, states = epidemic_batch(cg, name, state, 1, bunch_size, params['beta'], gamma, rng, record=True)
+    counts, states = counts[0], states[0]
+    for t in range(1, bunch_size + 1):
+        row = min(t, len(counts) - 1)
+        changed = np.flatnonzero(states[row] != states[row - 1]) if row == t else []
+        iterations.append({
+            "iteration": model.actual_iteration,
+            "status": {cg.nodes[i]: int(states[row][i]) for i in changed} if node_status else {},
+            "node_count": {s: int(counts[row][s]) for s in statuses},
+            "status_delta": {s: int(counts[row][s] - counts[row - 1][s]) if row == t else 0 for s in statuses},
+        })
+        model.actual_iteration += 1
+
+    model.status = dict(zip(cg.nodes, state.tolist()))
+    return iterations
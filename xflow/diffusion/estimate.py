@@ -0,0 +1,119 @@
+import math
+import statistics as s
+import numpy as np
+
+from .engine import STEPS
+from .parallel import parallel_simulate
+
+# Adaptive Monte Carlo spread estimation.
+#
+# Rounds are run in batches until the normal-approximation confidence interval
+# of the mean spread is narrow enough (relative to the mean or in absolute
+# nodes) or a round cap is reached. After each batch the rounds still needed
+# are projected from the current stdev, so low-variance seed sets stop after a
+# few batches and noisy ones keep sampling.
+
+
+class SpreadEstimate:
+    """Mean spread of a seed set with its confidence interval.
+
+    Attributes
+    ----------
+    mean, stdev : float
+    rounds : int
+        rounds the estimate is based on
+    ci : (float, float)
+        confidence interval of the mean
+    confidence : float
+    converged : bool
+        whether the requested interval width was reached before the round cap
+    results : list
+        spread of every round; empty for an estimate built from_moments
+    """
+
+    def __init__(self, results, confidence=0.95, converged=True):
+        self.results = results
+        self.rounds = len(results)
+        self.confidence = confidence
+        self.converged = converged
+        self.mean = s.mean(results) if results else 0.0
+        self.stdev = s.stdev(results) if len(results) > 1 else 0.0
+        h = self.half_width
+        self.ci = (self.mean - h, self.mean + h)
+
+    @classmethod
+    def from_moments(cls, mean, stdev, rounds, confidence=0.95):
+        """Estimate from the mean and stdev of ``rounds`` samples that are not kept."""
+        estimate = cls([], confidence)
+        estimate.mean, estimate.stdev, estimate.rounds = float(mean), float(stdev), rounds
+        h = estimate.half_width
+        estimate.ci = (estimate.mean - h, estimate.mean + h)
+        return estimate
+
+    @property
+    def half_width(self):
+        if self.rounds < 2:
+            return math.inf
+        return _z(self.confidence) * self.stdev / math.sqrt(self.rounds)
+
+    def __repr__(self):
+        return (f"SpreadEstimate(mean={self.mean:.3f}, stdev={self.stdev:.3f}, rounds={self.rounds}, "
+                f"ci=({self.ci[0]:.3f}, {self.ci[1]:.3f}), converged={self.converged})")
+
+
+def _z(confidence):
+    return s.NormalDist().inv_cdf((1 + confidence) / 2)
+
+
+def adaptive_spread(cg, model, seeds, horizon=STEPS, beta=0.1, rel_tol=0.01, abs_tol=None, confidence=0.95,
+                    min_rounds=64, max_rounds=10000, random_state=None, n_jobs=1):
+    """Estimate the spread of ``seeds`` with as many rounds as the requested precision needs.
+
+    Parameters
+    ----------
+    cg : CompiledGraph or SharedGraph
+    model : str
+        'IC', 'LT' or 'SI'
+    horizon : int, None or 'quiescent'
+        propagation steps per round, see engine.simulate
+    rel_tol : float or None
+        stop once the CI half-width is at most rel_tol * mean
+    abs_tol : float or None
+        stop once the CI half-width is at most abs_tol nodes; takes precedence over rel_tol
+    confidence : float
+        confidence level of the interval
+    min_rounds, max_rounds : int
+        size of the first batch and upper cap on the total rounds
+    random_state : int, SeedSequence or None
+        root seed; batch i draws from its i-th child stream
+    n_jobs : int
+        processes per batch
+
+    Returns
+    -------
+    SpreadEstimate
+    """
+    if rel_tol is None and abs_tol is None:
+        raise ValueError("One of rel_tol or abs_tol is required.")
+    root = random_state
+    if random_state is not None and not isinstance(random_state, np.random.SeedSequence):
+        root = np.random.SeedSequence(random_state)
+    z = _z(confidence)
+
+    results = []
+    batch = min(min_rounds, max_rounds)
+    while True:
+        stream = None if root is None else root.spawn(1)[0]
+        results += parallel_simulate(cg, model, seeds, batch, horizon, beta, random_state=stream, n_jobs=n_jobs)
+
+        mean = s.mean(results)
+        stdev = s.stdev(results) if len(results) > 1 else 0.0
+        tol = abs_tol if abs_tol is not None else rel_tol * mean
+        if len(results) > 1 and z * stdev / math.sqrt(len(results)) <= tol:
+            return SpreadEstimate(results, confidence, converged=True)
+        if len(results) >= max_rounds:
+            return SpreadEstimate(results, confidence, converged=False)
+
+        # project the rounds still needed, growing by at most 2x per batch
+        needed = (z * stdev / tol) ** 2 if tol > 0 else math.inf
+        batch = int(min(max(needed - len(results), min_rounds), len(results), max_rounds - len(results)))
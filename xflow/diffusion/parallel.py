@@ -0,0 +1,176 @@
+import copy
+import os
+import statistics as s
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from .engine import STEPS, simulate
+from .shared import SharedGraph, attach
+
+# Monte Carlo rounds spread over a process pool.
+#
+# Rounds are cut into fixed-size chunks and chunk i always draws from the i-th
+# child of one root SeedSequence, so a given random_state reproduces the same
+# per-round results whatever the number of workers, and the chunks are merged
+# back in chunk order. The graph reaches the workers as a SharedGraph handle,
+# so they attach to its arrays instead of unpickling a copy each.
+#
+# score_candidates fans the candidate sweep of a greedy step out the same way:
+# candidates are dealt to chunks by cost and every candidate draws from its
+# own stream, so the scores (and the argmax taken over them in candidate
+# order) do not depend on the number of workers.
+
+CHUNK_ROUNDS = 64
+
+
+def effective_n_jobs(n_jobs):
+    if n_jobs is None or n_jobs == 0:
+        return 1
+    if n_jobs < 0:
+        return max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+    return n_jobs
+
+
+def streams(random_state, count):
+    """``count`` independent generators derived from one root seed."""
+    if isinstance(random_state, np.random.SeedSequence):
+        root = random_state
+    else:
+        root = np.random.SeedSequence(random_state)
+    return root.spawn(count)
+
+
+_worker = {}
+
+
+def _init_worker(graph):
+    _worker['cg'] = attach(graph)
+
+
+def _run_chunk(model, seeds, rounds, horizon, beta, stream):
+    return simulate(_worker['cg'], model, seeds, rounds, horizon, beta, rng=np.random.default_rng(stream))
+
+
+def parallel_simulate(cg, model, seeds, rounds=100, horizon=STEPS, beta=0.1, random_state=None, n_jobs=1,
+                      chunk_rounds=CHUNK_ROUNDS):
+    """Like engine.simulate, with rounds split over ``n_jobs`` processes (-1 for all cores).
+
+    Parameters
+    ----------
+    cg : CompiledGraph or SharedGraph
+        a CompiledGraph is put in shared memory for the duration of the call
+    horizon : int, None or 'quiescent'
+        propagation steps per round, see engine.simulate
+    random_state : int, SeedSequence or None
+        root seed of the per-chunk random streams
+    chunk_rounds : int
+        rounds per chunk; results only depend on random_state and chunk_rounds
+    """
+    n_jobs = effective_n_jobs(n_jobs)
+    if n_jobs == 1 and random_state is None:
+        # unseeded single-process runs keep drawing from numpy's global state
+        return simulate(attach(cg), model, seeds, rounds, horizon, beta)
+
+    sizes = [min(chunk_rounds, rounds - start) for start in range(0, rounds, chunk_rounds)]
+    chunk_streams = streams(random_state, len(sizes))
+    seeds = list(seeds)
+
+    if n_jobs == 1 or len(sizes) == 1:
+        _init_worker(cg)
+        chunks = [_run_chunk(model, seeds, size, horizon, beta, stream)
+                  for size, stream in zip(sizes, chunk_streams)]
+    else:
+        shared = cg if isinstance(cg, SharedGraph) else SharedGraph(cg)
+        try:
+            with ProcessPoolExecutor(max_workers=min(n_jobs, len(sizes)), initializer=_init_worker,
+                                     initargs=(shared,)) as pool:
+                futures = [pool.submit(_run_chunk, model, seeds, size, horizon, beta, stream)
+                           for size, stream in zip(sizes, chunk_streams)]
+                chunks = [future.result() for future in futures]
+        finally:
+            if shared is not cg:
+                shared.close()
+
+    return [spread for chunk in chunks for spread in chunk]
+
+
+def _init_scorer(graph, worlds):
+    _init_worker(graph)
+    if worlds is not None:
+        worlds.cg = _worker['cg']
+    _worker['worlds'] = worlds
+
+
+def _score_chunk(model, base, candidates, rounds, horizon, beta, chunk_streams):
+    worlds = _worker['worlds']
+    if worlds is not None:
+        return [s.mean(worlds.spread(base + [node])) for node in candidates]
+    cg = _worker['cg']
+    return [s.mean(simulate(cg, model, base + [node], rounds, horizon, beta, rng=np.random.default_rng(stream)))
+            for node, stream in zip(candidates, chunk_streams)]
+
+
+def _balanced_chunks(cg, candidates, count):
+    # deal candidates to chunks from the highest out-degree down, so every
+    # chunk gets a similar share of the expensive ones
+    # one entry per candidate, in candidate order (to_index would sort and dedupe)
+    index = np.fromiter((cg.index[c] for c in candidates), dtype=np.int64, count=len(candidates))
+    degree = np.diff(cg.indptr)[index]
+    order = np.argsort(-degree, kind='stable')
+    return [np.sort(order[i::count]) for i in range(count) if i < len(order)]
+
+
+def score_candidates(cg, model, base, candidates, rounds=100, horizon=STEPS, beta=0.1, random_state=None,
+                     n_jobs=1, worlds=None, chunks_per_job=4):
+    """Mean spread of ``base + [v]`` for every candidate ``v``, in candidate order.
+
+    Parameters
+    ----------
+    cg : CompiledGraph or SharedGraph
+    base : list
+        seeds already selected
+    candidates : list
+        node labels to score
+    random_state : int, SeedSequence or None
+        root seed; candidate i draws from its i-th child stream, drawn from
+        fresh entropy if None
+    n_jobs : int
+        worker processes (-1 for all cores)
+    worlds : LiveEdgeWorlds or None
+        score against these pre-sampled worlds instead of fresh rounds; every
+        worker resamples the worlds it needs from their seeds
+    chunks_per_job : int
+        chunks per worker, more chunks even out the load
+    """
+    n_jobs = effective_n_jobs(n_jobs)
+    base = list(base)
+    candidates = list(candidates)
+    if not candidates:
+        return []
+    # fresh streams even without a seed: forked workers share numpy's global state
+    cand_streams = streams(random_state, len(candidates))
+
+    if n_jobs == 1:
+        _worker.update(cg=attach(cg), worlds=worlds)
+        return _score_chunk(model, base, candidates, rounds, horizon, beta, cand_streams)
+
+    chunks = _balanced_chunks(attach(cg), candidates, n_jobs * chunks_per_job)
+    shared = cg if isinstance(cg, SharedGraph) else SharedGraph(attach(cg))
+    if worlds is not None:
+        # workers get the world seeds, not the sampled worlds or the graph
+        worlds = copy.copy(worlds)
+        worlds.cg = None
+    try:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(chunks)), initializer=_init_scorer,
+                                 initargs=(shared, worlds)) as pool:
+            futures = [pool.submit(_score_chunk, model, base, [candidates[i] for i in chunk], rounds, horizon,
+                                   beta, [cand_streams[i] for i in chunk])
+                       for chunk in chunks]
+            scores = np.empty(len(candidates))
+            for chunk, future in zip(chunks, futures):
+                scores[chunk] = future.result()
+    finally:
+        if shared is not cg:
+            shared.close()
+
+    return scores.tolist()
@@ -0,0 +1,131 @@
+import os
+from multiprocessing import shared_memory
+import numpy as np
+
+from .engine import CompiledGraph
+
+# Zero-copy transport of compiled graphs to worker processes.
+#
+# A SharedGraph copies the CSR arrays of a CompiledGraph once into named
+# shared memory blocks (or .npy files that are memory-mapped), and pickles as
+# a small handle holding only the block names, shapes and dtypes. Workers call
+# attach() to get a CompiledGraph whose arrays are views on the shared buffers,
+# so fanning work out to N processes neither pickles the graph N times nor
+# keeps N copies of it in RAM.
+
+ARRAYS = ('indptr', 'indices', 'weights', 'labels')
+
+
+class SharedGraph:
+    """Shared-memory handle to a CompiledGraph.
+
+    Parameters
+    ----------
+    cg : CompiledGraph
+    path : str or None
+        directory to write memory-mapped .npy files to instead of using
+        ``multiprocessing.shared_memory``
+
+    Notes
+    -----
+    The process that creates the handle owns the storage and should call
+    ``close()`` (or use it as a context manager) once the workers are done.
+    Integer node labels are shared as an array too; any other labels are
+    pickled along with the handle.
+    """
+
+    def __init__(self, cg, path=None):
+        self.n = cg.n
+        self.directed = cg.directed
+        self.path = path
+        self.specs = {}
+        self.nodes = None
+        self._owner = True
+        self._blocks = {}
+        self._cg = None
+
+        arrays = {'indptr': cg.indptr, 'indices': cg.indices, 'weights': cg.weights}
+        if isinstance(cg.nodes, range) and cg.nodes == range(cg.n):
+            pass
+        elif all(isinstance(node, (int, np.integer)) for node in cg.nodes):
+            arrays['labels'] = np.asarray(cg.nodes, dtype=np.int64)
+        else:
+            self.nodes = list(cg.nodes)
+
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            self.specs[name] = (array.shape, array.dtype.str)
+            if path is not None:
+                np.save(os.path.join(path, name + '.npy'), array)
+            else:
+                block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+                self._blocks[name] = block
+        self.names = {name: block.name for name, block in self._blocks.items()}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.update(_owner=False, _blocks={}, _cg=None)
+        return state
+
+    def _array(self, name):
+        shape, dtype = self.specs[name]
+        if self.path is not None:
+            return np.load(os.path.join(self.path, name + '.npy'), mmap_mode='r')
+        if name not in self._blocks:
+            self._blocks[name] = _attach(self.names[name])
+        return np.ndarray(shape, dtype, buffer=self._blocks[name].buf)
+
+    def attach(self):
+        """Return a CompiledGraph backed by the shared arrays (cached per process)."""
+        if self._cg is None:
+            if self.nodes is not None:
+                nodes = self.nodes
+            elif 'labels' in self.specs:
+                nodes = self._array('labels').tolist()
+            else:
+                nodes = range(self.n)
+            self._cg = CompiledGraph(nodes, self._array('indptr'), self._array('indices'),
+                                     self._array('weights'), self.directed)
+        return self._cg
+
+    def close(self):
+        """Release the shared storage; only the creating process removes it."""
+        self._cg = None
+        for block in self._blocks.values():
+            block.close()
+            if self._owner:
+                block.unlink()
+        self._blocks = {}
+        if self._owner and self.path is not None:
+            for name in self.specs:
+                file = os.path.join(self.path, name + '.npy')
+                if os.path.exists(file):
+                    os.remove(file)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _attach(name):
+    block = shared_memory.SharedMemory(name=name)
+    # attaching registers the block with the resource tracker, which would then
+    # remove it when this worker exits although the parent still owns it
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(block._name, 'shared_memory')
+    except Exception:
+        pass
+    return block
+
+
+def attach(graph):
+    """Return the CompiledGraph behind a CompiledGraph or SharedGraph."""
+    if isinstance(graph, SharedGraph):
+        return graph.attach()
+    return graph
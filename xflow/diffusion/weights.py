@@ -0,0 +1,208 @@
+from collections.abc import MutableMapping
+import numpy as np
+import scipy.sparse as sp
+import ndlib.models.ModelConfig as mc
+
+# Edge weights stored as arrays.
+#
+# ndlib keeps edge parameters in a dict keyed by (a, b) tuples, a few hundred
+# bytes per edge that every baseline used to query edge by edge. EdgeWeights
+# keeps the 'threshold' of every edge in one float32 array in CSR order (row
+# u holds the out-edges of u sorted by target, both directions of every edge
+# for undirected graphs) together with a node-index map, so the diffusion
+# engine runs on it as is and lookups are array indexing.
+#
+# It is also an ndlib Configuration whose 'threshold' table is a view on that
+# array, so loaders can return it wherever a Configuration was returned and
+# code that reads config.config["edges"]['threshold'][(a, b)] keeps working.
+
+
+def _csr(n, src, dst, weights):
+    order = np.lexsort((dst, src))
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+    return indptr, dst[order], weights[order]
+
+
+class EdgeWeights(mc.Configuration):
+    """Edge weights of a graph aligned to its CSR edge order.
+
+    Parameters
+    ----------
+    nodes : list
+        node labels, index ``i`` is ``nodes[i]``
+    indptr, indices : ndarray
+        CSR structure with the targets of every row sorted
+    weights : ndarray
+        weight of every CSR entry, stored as float32
+    directed : bool
+        for undirected graphs every edge is stored in both rows
+    """
+
+    def __init__(self, nodes, indptr, indices, weights, directed=False):
+        super().__init__()
+        self.nodes = nodes
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.directed = directed
+        self.n = len(nodes)
+        self.m = len(indices)
+        self._index = None
+        self.config["edges"]['threshold'] = _Thresholds(self)
+
+    @classmethod
+    def from_graph(cls, g, weights=None, attr='weight', default=1.0):
+        """Build the weights of ``g`` from a sequence in ``g.edges()`` order, or from its ``attr`` edge attribute."""
+        nodes = list(g.nodes())
+        index = {node: i for i, node in enumerate(nodes)}
+        m = g.number_of_edges()
+        if weights is None:
+            edges = g.edges(data=attr, default=default)
+            weights = np.fromiter((w for _, _, w in edges), dtype=np.float32, count=m)
+        else:
+            weights = np.asarray(weights, dtype=np.float32)
+        src = np.fromiter((index[a] for a, _ in g.edges()), dtype=np.int64, count=m)
+        dst = np.fromiter((index[b] for _, b in g.edges()), dtype=np.int64, count=m)
+
+        directed = g.is_directed()
+        if not directed:
+            # self-loops are stored once, like networkx lists them once among the neighbours
+            mirror = src != dst
+            src, dst = np.concatenate([src, dst[mirror]]), np.concatenate([dst, src[mirror]])
+            weights = np.concatenate([weights, weights[mirror]])
+
+        indptr, indices, weights = _csr(len(nodes), src, dst, weights)
+        ew = cls(nodes, indptr, indices, weights, directed)
+        ew._index = index
+        return ew
+
+    @classmethod
+    def from_config(cls, g, config):
+        """Build the weights of ``g`` from the 'threshold' edge parameter of an ndlib Configuration.
+
+        The other parameters of ``config`` are carried over. An EdgeWeights
+        built for ``g`` is returned as is; one built for another graph, e.g.
+        the graph ``g`` is a copy of with some nodes or edges removed, gives
+        the weights of the edges of ``g`` it holds.
+        """
+        if isinstance(config, EdgeWeights) and config.matches(g):
+            return config
+        thresholds = config.config["edges"]['threshold']
+        ew = cls.from_graph(g, [thresholds[edge] for edge in g.edges()])
+        for key in ("nodes", "model", "status"):
+            ew.config[key].update(config.config[key])
+        for param, values in config.config["edges"].items():
+            if param != 'threshold':
+                ew.config["edges"][param] = dict(values)
+        return ew
+
+    def to_config(self):
+        """Return a plain ndlib Configuration with the same parameters."""
+        config = mc.Configuration()
+        for key in ("nodes", "model", "status"):
+            config.config[key].update(self.config[key])
+        for param, values in self.config["edges"].items():
+            if param != 'threshold':
+                config.config["edges"][param] = dict(values)
+        primary = self._primary()
+        thresholds = zip(self.edges(), self.weights[primary].tolist())
+        config.config["edges"]['threshold'] = dict(thresholds)
+        return config
+
+    def matches(self, g):
+        """Whether these weights were built for ``g``: same nodes in the same order, same edges."""
+        if self.n != g.number_of_nodes() or self.directed != g.is_directed():
+            return False
+        if any(a != b for a, b in zip(self.nodes, g.nodes())):
+            return False
+        # g.adj lists the out-neighbours of directed graphs, self-loops once like the CSR rows
+        degree = np.fromiter((len(g.adj[node]) for node in self.nodes), dtype=np.int64, count=self.n)
+        if not np.array_equal(degree, np.diff(self.indptr)):
+            return False
+        # edges rewired in place keep every degree, so compare the targets too
+        index = self.index
+        targets = np.fromiter((index[b] for node in self.nodes for b in g.adj[node]), dtype=np.int64,
+                              count=self.m)
+        return np.array_equal(targets[np.lexsort((targets, self._sources()))], self.indices)
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = {node: i for i, node in enumerate(self.nodes)}
+        return self._index
+
+    @property
+    def nbytes(self):
+        return self.indptr.nbytes + self.indices.nbytes + self.weights.nbytes
+
+    def _sources(self):
+        return np.repeat(np.arange(self.n), np.diff(self.indptr))
+
+    def _primary(self):
+        # CSR positions listing every graph edge once
+        if self.directed:
+            return np.arange(self.m)
+        return np.flatnonzero(self._sources() <= self.indices)
+
+    def position(self, a, b):
+        """CSR position of the edge (a, b); KeyError if there is none."""
+        i, j = self.index[a], self.index[b]
+        start, end = self.indptr[i], self.indptr[i + 1]
+        k = start + np.searchsorted(self.indices[start:end], j)
+        if k == end or self.indices[k] != j:
+            raise KeyError((a, b))
+        return k
+
+    def get(self, a, b, default=None):
+        try:
+            return float(self.weights[self.position(a, b)])
+        except KeyError:
+            return default
+
+    def set(self, a, b, value):
+        """Change the weight of an existing edge (both directions of an undirected one)."""
+        self.weights[self.position(a, b)] = value
+        if not self.directed:
+            self.weights[self.position(b, a)] = value
+
+    def edges(self):
+        """Every edge once as a (label, label) tuple, undirected ones with the lower index first."""
+        primary = self._primary()
+        nodes = self.nodes
+        src = self._sources()[primary].tolist()
+        dst = self.indices[primary].tolist()
+        return [(nodes[i], nodes[j]) for i, j in zip(src, dst)]
+
+    def matrix(self):
+        """Weighted (n x n) sparse adjacency matrix."""
+        return sp.csr_matrix((self.weights, self.indices, self.indptr), shape=(self.n, self.n))
+
+
+class _Thresholds(MutableMapping):
+    """The ``config["edges"]['threshold']`` dict of an EdgeWeights, backed by its arrays."""
+
+    def __init__(self, weights):
+        self.weights = weights
+
+    def __getitem__(self, edge):
+        return float(self.weights.weights[self.weights.position(*edge)])
+
+    def __setitem__(self, edge, value):
+        self.weights.set(*edge, value)
+
+    def __delitem__(self, edge):
+        raise TypeError("edges cannot be removed from EdgeWeights")
+
+    def __contains__(self, edge):
+        try:
+            self.weights.position(*edge)
+        except (KeyError, TypeError):
+            return False
+        return True
+
+    def __iter__(self):
+        return iter(self.weights.edges())
+
+    def __len__(self):
+        return len(self.weights._primary())
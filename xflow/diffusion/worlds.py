@@ -0,0 +1,211 @@
+import itertools
+from collections import OrderedDict, defaultdict
+import numpy as np
+
+from .engine import STEPS, check_horizon, compile_graph
+from .parallel import streams
+
+# Pre-sampled live-edge worlds.
+#
+# Every world fixes the outcome of all random draws of one cascade, stored as
+# a transmission delay per edge: under IC a live edge fires one step after its
+# source activates (delay 1) and a dead edge never does, under SI an edge fires
+# after a geometric(beta) number of steps, which is the same as retrying it
+# with probability beta at every step. A node is reached within `horizon` steps
+# if its shortest delay-path from the seeds is at most `horizon`, so the spread
+# of a seed set in a world is the size of the union of its seeds' reach sets.
+# Without a horizon only whether an edge ever fires matters: every SI edge
+# eventually does, so quiescent SI worlds are all the full reachability graph.
+#
+# Scoring every candidate seed set against the same worlds (common random
+# numbers) makes comparisons between candidates far less noisy than fresh
+# Monte Carlo draws, and per-node reach sets can be memoized.
+
+NEVER = 255
+
+
+class LiveEdgeWorlds:
+    """``rounds`` live-edge worlds of ``g`` sampled once and reused for every spread query.
+
+    Parameters
+    ----------
+    g : networkx graph
+    config : ndlib Configuration with the edge thresholds
+    rounds : int
+        number of worlds
+    model : str
+        'IC' or 'SI'
+    beta : float
+        infection rate, SI only
+    horizon : int, None or 'quiescent'
+        propagation steps per cascade, or None / 'quiescent' for no limit
+    random_state : int, SeedSequence or None
+        root seed; world i is always regenerated from the i-th child stream
+    max_bytes : int or None
+        memory cap for the sampled worlds; least recently used worlds are
+        dropped beyond it and resampled (identically) when needed again
+    max_reach_bytes : int
+        memory cap for memoized reach sets, also evicted least recently used
+    """
+
+    def __init__(self, g, config, rounds=100, model='IC', beta=0.1, horizon=STEPS, random_state=None,
+                 max_bytes=None, max_reach_bytes=1 << 28):
+        self.model = model.upper()
+        if self.model not in ("IC", "SI"):
+            raise ValueError(f"Live-edge worlds are not defined for model: {model}")
+        steps = check_horizon(horizon)
+        if steps is not None and steps >= NEVER:
+            raise ValueError(f"horizon must be below {NEVER}")
+
+        self.cg = compile_graph(g, config)
+        self.rounds = rounds
+        self.beta = beta
+        self.steps = steps
+        self.streams = streams(random_state, rounds)
+
+        capacity = rounds
+        if max_bytes is not None:
+            capacity = int(min(rounds, max(1, max_bytes // max(self.cg.m, 1))))
+        self._slots = np.empty((capacity, self.cg.m), dtype=np.uint8)
+        self._slot_of = OrderedDict()
+
+        self.max_reach_bytes = max_reach_bytes
+        self._reach = OrderedDict()
+        self._reach_bytes = 0
+        self._union = OrderedDict()
+
+    def __getstate__(self):
+        # pickled with the world seeds only: the worlds and reach sets are resampled
+        state = self.__dict__.copy()
+        state.update(_slots=self._slots.shape, _slot_of=OrderedDict(), _reach=OrderedDict(), _reach_bytes=0,
+                     _union=OrderedDict())
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._slots = np.empty(self._slots, dtype=np.uint8)
+
+    def _sample(self, world, slot):
+        rng = np.random.default_rng(self.streams[world])
+        if self.model == "IC":
+            live = rng.random(self.cg.m) <= self.cg.weights
+            self._slots[slot] = np.where(live, 1, NEVER)
+        elif self.steps is None:
+            self._slots[slot] = 1 if self.beta > 0 else NEVER
+        else:
+            delay = rng.geometric(self.beta, self.cg.m)
+            self._slots[slot] = np.minimum(delay, NEVER)
+
+    def _load(self, worlds):
+        """Make sure the given worlds are sampled and return their slots."""
+        slots = np.empty(len(worlds), dtype=np.int64)
+        for i, world in enumerate(worlds):
+            if world in self._slot_of:
+                self._slot_of.move_to_end(world)
+            else:
+                if len(self._slot_of) < len(self._slots):
+                    slot = len(self._slot_of)
+                else:
+                    _, slot = self._slot_of.popitem(last=False)
+                self._sample(world, slot)
+                self._slot_of[world] = slot
+            slots[i] = self._slot_of[world]
+        return slots
+
+    def _bfs(self, worlds, node):
+        """Flat world * n + v positions reached from ``node`` in each of ``worlds``."""
+        n = self.cg.n
+        slots = self._load(worlds)
+        # positions are local (i * n + v for the i-th world of the batch) until the end
+        visited = np.zeros(len(worlds) * n, dtype=bool)
+        frontier = np.arange(len(worlds)) * n + node
+        visited[frontier] = True
+        arrivals = defaultdict(list)
+        horizon = self.steps if self.steps is not None else np.inf
+
+        for t in itertools.count(1):
+            if t > horizon or (frontier.size == 0 and not arrivals):
+                break
+            if frontier.size:
+                local, v = np.divmod(frontier, n)
+                edges, counts = self.cg.edges_of(v, return_counts=True)
+                local = np.repeat(local, counts)
+                delay = self._slots[slots[local], edges]
+                arrival = delay.astype(np.int64) + (t - 1)
+                keep = (delay != NEVER) & (arrival <= horizon)
+                targets = local[keep] * n + self.cg.indices[edges[keep]]
+                arrival = arrival[keep]
+                for a in np.unique(arrival):
+                    arrivals[a].append(targets[arrival == a])
+            if t not in arrivals:
+                frontier = np.empty(0, dtype=np.int64)
+                continue
+            targets = np.concatenate(arrivals.pop(t))
+            frontier = np.unique(targets[~visited[targets]])
+            visited[frontier] = True
+
+        local, v = np.divmod(np.flatnonzero(visited), n)
+        return np.asarray(worlds, dtype=np.int64)[local] * n + v
+
+    def reach(self, node):
+        """Sorted flat world * n + v positions reached from ``node`` (a label) in every world."""
+        i = self.cg.index[node]
+        if i in self._reach:
+            self._reach.move_to_end(i)
+            return self._reach[i]
+
+        # keep the worlds already in memory together so a capped cache is not thrashed
+        order = sorted(range(self.rounds), key=lambda w: w not in self._slot_of)
+        capacity = len(self._slots)
+        parts = [self._bfs(order[b:b + capacity], i) for b in range(0, self.rounds, capacity)]
+        reached = np.sort(np.concatenate(parts))
+
+        self._reach[i] = reached
+        self._reach_bytes += reached.nbytes
+        while self._reach_bytes > self.max_reach_bytes and len(self._reach) > 1:
+            _, dropped = self._reach.popitem(last=False)
+            self._reach_bytes -= dropped.nbytes
+        return reached
+
+    def _reached(self, seeds):
+        """Sorted positions reached from a seed set, and their count per world."""
+        key = frozenset(seeds)
+        if key in self._union:
+            self._union.move_to_end(key)
+            return self._union[key]
+        if len(seeds) == 1:
+            reached = self.reach(seeds[0])
+        else:
+            reached = np.union1d(self._reached(seeds[:-1])[0], self.reach(seeds[-1]))
+        counts = np.bincount(reached // self.cg.n, minlength=self.rounds)
+        # only the last few sets are kept: greedy scores many S + {v} against one S
+        self._union[key] = (reached, counts)
+        while len(self._union) > 4:
+            self._union.popitem(last=False)
+        return reached, counts
+
+    def spread(self, seeds):
+        """Return the spread of ``seeds`` in every world, like ``IC(g, config, seeds, rounds)``."""
+        seeds = list(dict.fromkeys(seeds))
+        if not seeds:
+            return [0] * self.rounds
+        if len(seeds) == 1:
+            return self._reached(seeds)[1].tolist()
+
+        # S + {v}: count the positions v reaches that S does not
+        reached, counts = self._reached(seeds[:-1])
+        extra = self.reach(seeds[-1])
+        pos = np.minimum(np.searchsorted(reached, extra), reached.size - 1)
+        extra = extra[reached[pos] != extra]
+        return (counts + np.bincount(extra // self.cg.n, minlength=self.rounds)).tolist()
+
+
+def live_edge_worlds(g, config, rounds=100, model='IC', beta=0.1, horizon=STEPS, random_state=None):
+    """Return the LiveEdgeWorlds of ``g`` for these parameters, sampling them only once."""
+    cg = compile_graph(g, config)
+    if not hasattr(cg, 'worlds'):
+        cg.worlds = {}
+    key = (rounds, model.upper(), beta, check_horizon(horizon), random_state)
+    if key not in cg.worlds:
+        cg.worlds[key] = LiveEdgeWorlds(g, config, rounds, model, beta, horizon, random_state)
+    return cg.worlds[key]
@@ -15,8 +15,10 @@ from networkx import Graph
 from torch_geometric.data.data import Data, torch
 import xflow
 from xflow.dataset.nx import connSW
+from xflow.diffusion import iteration_bunch
 import ndlib.models.epidemics as ep
 import ndlib.models.ModelConfig as mc
+from xflow.diffusion.weights import EdgeWeights
 import warnings
 from torch_geometric.utils.convert import from_networkx
 from sklearn.metrics import classification_report, ConfusionMatrixDisplay
@@ -27,32 +29,27 @@ from torch_geometric.utils import to_networkx
 def connSW(n, beta=None):
     g = nx.connected_watts_strogatz_graph(n, 10, 0.1) #Generate connSW graph
 
-    config = mc.Configuration()
-
-    #add edge weights in ndlib config
     for a, b in g.edges():
         weight = random.randrange(40,80)
         weight = round(weight / 100, 2)
         if beta:
             weight = beta
         g[a][b]['weight'] = weight
-        config.add_edge_configuration("threshold", (a, b), weight)
 
+    config = EdgeWeights.from_graph(g)
     return g, config
 
 def BA(n=1000, beta=None):
     g = nx.barabasi_albert_graph(n, 5)
 
-    config = mc.Configuration()
-
     for a, b in g.edges():
         weight = random.randrange(40,80)
         weight = round(weight / 100, 2)
         if beta:
             weight = beta
         g[a][b]['weight'] = weight
-        config.add_edge_configuration("threshold", (a, b), weight)
 
+    config = EdgeWeights.from_graph(g)
     return g, config
 
 def ER(n=5000, beta=None):
@@ -61,16 +58,14 @@ def ER(n=5000, beta=None):
     while nx.is_connected(g) == False:
         g = nx.erdos_renyi_graph(n, 0.1)
 
-    config = mc.Configuration()
-
     for a, b in g.edges():
         weight = random.randrange(40,80)
         weight = round(weight / 100, 2)
         if beta:
             weight = beta
-        config.add_edge_configuration("threshold", (a, b), weight)
         g[a][b]['weight'] = weight
 
+    config = EdgeWeights.from_graph(g)
     return g, config
 
 graph_gen_dict = {'connSW':connSW, 'BA':BA, 'ER':ER} #dictionary of string to graph gen mappings, shpuld be a generator that
@@ -121,7 +116,7 @@ def run_sim(distance, interval_lower, g, model):
 
 
     #run the simulation
-    iterations = model.iteration_bunch(r+dist_max+1, node_status=True)
+    iterations = iteration_bunch(model, r+dist_max+1, node_status=True)
 
     node_states_iterations = []
     node_states = {}
@@ -6,6 +6,12 @@ import networkx as nx
 import ndlib.models.epidemics as ep
 import ndlib.models.ModelConfig as mc
 
+try:
+    # runs the ndlib models on xflow's array engine when available
+    from xflow.diffusion.epidemics import iteration_bunch
+except ImportError:
+    iteration_bunch = None
+
 
 class StaticNetworkContagion:
     """A stochastic epidemic process defined on a static network.
@@ -170,7 +176,10 @@ class StaticNetworkContagion:
         -----
         Can be run more than once; this just adds steps to the simulation history.
         """
-        self.history += self.sim.iteration_bunch(steps)
+        if iteration_bunch is not None:
+            self.history += iteration_bunch(self.sim, steps)
+        else:
+            self.history += self.sim.iteration_bunch(steps)
         if verbose:
             return self.history
         return None
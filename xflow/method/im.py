@@ -1,9 +1,12 @@
 import networkx as nx
 import numpy as np
+import scipy as sp
+import scipy.sparse.linalg
 import ndlib
 import ndlib.models.epidemics as ep
 import ndlib.models.ModelConfig as mc
 import statistics as s
+import math
 import random
 import matplotlib.pyplot as plt
 import numpy as np
@@ -12,325 +15,455 @@ import time
 from random import uniform, seed
 
 from collections import Counter
+import heapq
 import operator
 import copy
 from xflow.diffusion.SI import SI
 from xflow.diffusion.IC import IC
 from xflow.diffusion.LT import LT
+from xflow.diffusion.engine import STEPS, compile_graph
+from xflow.diffusion.worlds import live_edge_worlds
+from xflow.diffusion.parallel import score_candidates
+from xflow.method.rr import RRSampler, RRCollection, ParallelRRSampler, SamplingStats
 
 # random
 
+def _spread_params(rounds, model, beta):
+    # the parameters an estimate depends on, for SpreadCache keys
+    params = dict(rounds=rounds, horizon=STEPS)
+    if model.upper() == "SI":
+        params['beta'] = beta
+    return params
+
+def _estimator(g, config, rounds, model, beta, worlds=None, cache=None):
+    """Return a function mapping a seed list to its mean estimated spread.
+
+    With ``worlds`` (a LiveEdgeWorlds, or True to use the cached worlds of g)
+    every seed set is scored against the same pre-sampled live-edge worlds
+    instead of fresh Monte Carlo rounds. With a SpreadCache ``cache`` the
+    Monte Carlo estimates are looked up there first.
+    """
+    model = model.upper()
+    if worlds is True:
+        worlds = live_edge_worlds(g, config, rounds, model, beta)
+    if worlds is not None:
+        return lambda seeds: s.mean(worlds.spread(seeds))
+
+    if model == "IC":
+        spread_of = lambda seeds: s.mean(IC(g, config, seeds, rounds))
+    elif model == "LT":
+        spread_of = lambda seeds: s.mean(LT(g, config, seeds, rounds))
+    elif model == "SI":
+        spread_of = lambda seeds: s.mean(SI(g, config, seeds, rounds, beta))
+    else:
+        raise ValueError(f"Unknown model: {model}")
+
+    if cache is None:
+        return spread_of
+    cg = compile_graph(g, config)
+    params = _spread_params(rounds, model, beta)
+    return lambda seeds: cache.lookup(cg, model, [seeds], lambda sets: [spread_of(sets[0])], **params)[0]
+
+# budget sweeps
+# The selections below are prefix-consistent: the seeds for a smaller budget
+# are the first ones picked for a larger budget, so a list of budgets is
+# answered by a single run up to the largest one.
+
+def _max_budget(budget):
+    return budget if np.ndim(budget) == 0 else max(budget)
+
+def _by_budget(selected, budget):
+    """The selection for an int budget, or {b: its first b seeds} for a list of budgets."""
+    if np.ndim(budget) == 0:
+        return selected
+    return {b: selected[:b] for b in budget}
+
 # baselines: simulation based
 
 # greedy
-def greedy(g, config, budget, rounds=100, model='SI', beta=0.1):
+def greedy(g, config, budget, rounds=100, model='SI', beta=0.1, worlds=None, n_jobs=1, random_state=None,
+           cache=None):
+
+    if worlds is True:
+        worlds = live_edge_worlds(g, config, rounds, model, beta)
+    cg = compile_graph(g, config)
 
     selected = []
     candidates = list(g.nodes())
 
-    for i in range(budget):
+    for i in range(_max_budget(budget)):
+
+        # candidates are scored in parallel, the first best one wins as before
+        score = lambda sets: score_candidates(cg, model.upper(), selected, [seeds[-1] for seeds in sets], rounds,
+                                              beta=beta, random_state=random_state, n_jobs=n_jobs, worlds=worlds)
+        seed_sets = [selected + [node] for node in candidates]
+        if cache is not None and worlds is None:
+            params = _spread_params(rounds, model, beta)
+            if random_state is not None:
+                params['random_state'] = random_state
+            scores = cache.lookup(cg, model, seed_sets, score, **params)
+        else:
+            scores = score(seed_sets)
 
         max = 0
         index = -1
-        for node in candidates:
-            seeds = selected + [node]
-
-            if (model == "IC"):
-                result = IC(g, config, seeds, rounds)
-            elif (model == "LT"):
-                result = LT(g, config, seeds, rounds)
-            elif (model == "SI"):
-                result = SI(g, config, seeds, rounds, beta)
-            
-            if s.mean(result) > max:
-                max = s.mean(result)
+        for node, result in zip(candidates, scores):
+            if result > max:
+                max = result
                 index = node
 
+        if index == -1:
+            raise ValueError("No valid node found to select. Check the model implementation and input graph.")
+
         selected.append(index)
         candidates.remove(index)
 
     print(selected)
-    return selected
+    return _by_budget(selected, budget)
 
-def celf(g, config, budget, rounds=100, model='SI', beta=0.1): 
-    # Find the first node with greedy algorithm
-    
-    # Compute marginal gain for each node
-    candidates = list(g.nodes())
-    #, start_time = list(g.nodes()), time.time()
-    # step 1, call a diffusion function, get the result of list
-    # step 2, calculate the margin gain 
-    if (model == "IC"):
-        marg_gain = [s.mean(IC(g, config, [node])) for node in candidates]
-    elif (model == "LT"):
-        marg_gain = [s.mean(LT(g, config, [node])) for node in candidates]
-    elif (model == "SI"):
-         marg_gain = [s.mean(SI(g, config, [node], beta)) for node in candidates]
-    # Create the sorted list of nodes and their marginal gain 
-    Q = sorted(zip(candidates,marg_gain), key = lambda x: x[1],reverse=True)
-
-    # Select the first node and remove from candidate list
-    selected, spread, Q = [Q[0][0]], Q[0][1], Q[1:]
-    
-    # Find the next budget-1 nodes using the CELF list-sorting procedure
-    
-    for _ in range(budget-1):    
-
-        check = False      
-        while not check:
-            
-            # Recalculate spread of top node
-            current = Q[0][0]
-            
-            # Evaluate the spread function and store the marginal gain in the list
-            if (model == "IC"):
-                Q[0] = (current, s.mean(IC(g, config, selected+[current]), rounds) - spread)
-            elif (model == "LT"):
-                Q[0] = (current, s.mean(LT(g, config, selected+[current]), rounds) - spread)
-            elif (model == "SI"):
-                Q[0] = (current, s.mean(SI(g, config, selected+[current]), rounds, beta) - spread)
-
-            # Re-sort the list
-            Q = sorted(Q, key = lambda x: x[1], reverse=True)
-
-            # Check if previous top node stayed on top after the sort
-            check = Q[0][0] == current
-
-        # Select the next node
-        selected.append(Q[0][0])
-        spread = Q[0][1]
-        
-        # Remove the selected node from the list
-        Q = Q[1:]
-
-    print(selected)
-    return(selected)
+def _lazy_greedy(spread_of, candidates, budget):
+    """Lazy forward selection (CELF) on a max-heap of marginal gains.
 
-def celfpp(g, config, budget, rounds=100, model='SI', beta=0.1):
+    Every entry remembers how many seeds were selected when its gain was
+    computed. By submodularity an older gain is an upper bound on the current
+    one, so the top entry is only re-evaluated when it is stale and is
+    selected as soon as its gain is up to date.
+    """
+    heap = [(-spread_of([node]), i, node, 0) for i, node in enumerate(candidates)]
+    heapq.heapify(heap)
+
+    selected, spread = [], 0
+    while heap and len(selected) < budget:
+        gain, i, node, stamp = heap[0]
+        if stamp == len(selected):
+            heapq.heappop(heap)
+            selected.append(node)
+            spread -= gain
+        else:
+            gain = spread_of(selected + [node]) - spread
+            heapq.heapreplace(heap, (-gain, i, node, len(selected)))
 
-    # Compute marginal gain for each node
-    candidates = list(g.nodes())
-    if (model == "IC"):
-        marg_gain = [s.mean(IC(g, config, [node], rounds)) for node in candidates]
-    elif (model == "LT"):
-        marg_gain = [s.mean(LT(g, config, [node], rounds)) for node in candidates]
-    elif (model == "SI"):
-        marg_gain = [s.mean(SI(g, config, [node], rounds, beta)) for node in candidates]
+    return selected
 
-    # Create the sorted list of nodes and their marginal gain 
-    Q = sorted(zip(candidates, marg_gain), key = lambda x: x[1], reverse=True)
+def celf(g, config, budget, rounds=100, model='SI', beta=0.1, worlds=None, cache=None): 
 
-    # Select the first node and remove from candidate list
-    selected, spread, Q = [Q[0][0]], Q[0][1], Q[1:]
+    spread_of = _estimator(g, config, rounds, model, beta, worlds, cache)
 
-    # Initialize last_seed as the first selected node
-    last_seed = selected[0]
-    
-    # Find the next budget-1 nodes using the CELF++ procedure
-    for _ in range(budget - 1):    
-        check = False
-        while not check:
-            # Get current node and its previous computed marginal gain
-            current, old_gain = Q[0][0], Q[0][1]
-
-            # Check if the last added seed has changed
-            if current != last_seed:
-                # Compute new marginal gain
-                if (model == "IC"):
-                    new_gain = s.mean(IC(g, config, selected+[current], rounds)) - spread
-                elif (model == "LT"):
-                    new_gain = s.mean(LT(g, config, selected+[current], rounds)) - spread
-                elif (model == "SI"):
-                    new_gain = s.mean(SI(g, config, selected+[current], rounds, beta)) - spread
-            else:
-                # If the last added seed hasn't changed, the marginal gain remains the same
-                new_gain = old_gain
-
-            # Update the marginal gain of the current node
-            Q[0] = (current, new_gain)
-
-            # Re-sort the list
-            Q = sorted(Q, key = lambda x: x[1], reverse=True)
-
-            # Check if previous top node stayed on top after the sort
-            check = Q[0][0] == current
-
-        # Select the next node
-        selected.append(Q[0][0])
-        spread += Q[0][1]  # Update the spread
-        last_seed = Q[0][0]  # Update the last added seed
-
-        # Remove the selected node from the list
-        Q = Q[1:]
+    selected = _lazy_greedy(spread_of, list(g.nodes()), _max_budget(budget))
 
     print(selected)
-    return selected
+    return _by_budget(selected, budget)
 
-# baselines: proxy based
-# eigen centrality 
-def eigen(g, config, budget):
-
-    g_eig = g.__class__()
-    g_eig.add_nodes_from(g)
-    g_eig.add_edges_from(g.edges)
-    for a, b in g_eig.edges():
-        weight = config.config["edges"]['threshold'][(a, b)]
-        g_eig[a][b]['weight'] = weight
+def _celfpp(spread_of, candidates, budget, lookahead=True):
+    """CELF++ (Goyal et al., 2011): CELF with a one-step look-ahead.
 
-    eig = []
+    Along with its gain mg1 with respect to S, every candidate stores
+    prev_best, the best candidate of the current iteration when it was
+    evaluated, and its gain mg2 with respect to S + {prev_best}. If prev_best
+    is the seed selected next, mg2 becomes the new mg1 without another spread
+    evaluation.
 
-    for k in range(budget):
+    mg2 is only a valid gain when every spread is measured on the same random
+    numbers (live-edge worlds); otherwise it is the difference of independent
+    estimates, can exceed mg1 or drop below zero, so without ``lookahead`` the
+    selection is plain CELF.
 
-        eigen = nx.eigenvector_centrality_numpy(g_eig)
-        selected = sorted(eigen, key=eigen.get, reverse=True)[0]
-        eig.append(selected)
-        g_eig.remove_node(selected)
+    Returns the seeds, the number of spread evaluations and the number of
+    evaluations the look-ahead avoided.
+    """
+    mg1, mg2, prev_best, flag = {}, {}, {}, {}
+    selected, spread = [], 0
+    evaluations, avoided = 0, 0
+    last_seed, cur_best = None, None
+
+    def evaluate(node):
+        nonlocal evaluations, cur_best
+        k = len(selected)
+        mg1[node] = spread_of(selected + [node]) - spread
+        prev_best[node] = cur_best if lookahead else None
+        evaluations += 1
+        if prev_best[node] is not None:
+            # node goes last so the union of S + {prev_best} is reused across nodes
+            base = spread + mg1[cur_best]
+            mg2[node] = spread_of(selected + [cur_best, node]) - base
+            evaluations += 1
+        flag[node] = k
+        if cur_best is None or mg1[node] > mg1[cur_best]:
+            cur_best = node
+
+    heap = []
+    for i, node in enumerate(candidates):
+        evaluate(node)
+        heap.append((-mg1[node], i, node))
+    heapq.heapify(heap)
+
+    while heap and len(selected) < budget:
+        _, i, node = heap[0]
+        k = len(selected)
+        if flag[node] == k:
+            heapq.heappop(heap)
+            selected.append(node)
+            spread += mg1[node]
+            last_seed, cur_best = node, None
+            continue
+        if flag[node] == k - 1 and prev_best[node] == last_seed:
+            mg1[node] = mg2[node]
+            flag[node] = k
+            avoided += 1
+            if cur_best is None or mg1[node] > mg1[cur_best]:
+                cur_best = node
+        else:
+            evaluate(node)
+        heapq.heapreplace(heap, (-mg1[node], i, node))
+
+    return selected, evaluations, avoided
+
+class CELFStats:
+    """Spread evaluations of a CELF++ run.
+
+    Attributes
+    ----------
+    evaluations : int
+        spread estimates computed
+    avoided : int
+        re-evaluations the look-ahead made unnecessary
+    """
 
-    print(eig)
-    return eig
+    def __init__(self):
+        self.evaluations = 0
+        self.avoided = 0
 
-# degree
-def degree(g, config, budget):
-    g_deg = g.__class__()
-    g_deg.add_nodes_from(g)
-    g_deg.add_edges_from(g.edges)
-    for a, b in g_deg.edges():
-        weight = config.config["edges"]['threshold'][(a, b)]
-        g_deg[a][b]['weight'] = weight
+    def __repr__(self):
+        return f"CELFStats(evaluations={self.evaluations}, avoided={self.avoided})"
 
-    deg = []
+def celfpp(g, config, budget, rounds=100, model='SI', beta=0.1, worlds=None, cache=None, stats=None):
+    """CELF++ seeds; pass a CELFStats as ``stats`` to get its evaluation counts.
 
-    for k in range(budget):
-        degree = nx.centrality.degree_centrality(g_deg)
-        selected = sorted(degree, key=degree.get, reverse=True)[0]
-        deg.append(selected)
-        g_deg.remove_node(selected)
+    The look-ahead gains need common random numbers, so unless ``worlds`` is
+    given IC and SI spreads are measured on the cached live-edge worlds of g.
+    With a ``cache``, ``worlds=False`` or LT the spreads are fresh Monte Carlo
+    estimates and the look-ahead is off.
+    """
 
-    print(deg)
-    return deg
+    if worlds is None and cache is None and model.upper() in ("IC", "SI"):
+        worlds = True
+    lookahead = worlds not in (None, False)
+    spread_of = _estimator(g, config, rounds, model, beta, worlds or None, cache)
 
-# pi
-def pi(g, config, budget):
-    g_greedy = g.__class__()
-    g_greedy.add_nodes_from(g)
-    g_greedy.add_edges_from(g.edges)
+    selected, evaluations, avoided = _celfpp(spread_of, list(g.nodes()), _max_budget(budget), lookahead)
+    if stats is not None:
+        stats.evaluations, stats.avoided = evaluations, avoided
 
-    for a, b in g_greedy.edges():
-        weight = config.config["edges"]['threshold'][(a, b)]
-        g_greedy[a][b]['weight'] = weight
+    print(selected)
+    return _by_budget(selected, budget)
 
-    result = []
+# baselines: proxy based
+# The proxies run on the compiled CSR arrays of the weighted graph: removing a
+# selected node only masks its row and column instead of copying the graph.
+
+def _leading_eigenvector(M, v0=None):
+    # same as nx.eigenvector_centrality_numpy, without its connectivity check
+    if M.shape[0] < 3:
+        vals, vecs = np.linalg.eig(M.toarray().T)
+        largest = vecs[:, np.argmax(vals.real)].real
+    else:
+        _, vec = sp.sparse.linalg.eigs(M.T.astype(float), k=1, which='LR', v0=v0)
+        largest = vec.flatten().real
+    return largest / (np.sign(largest.sum()) * np.linalg.norm(largest))
+
+def _power_iteration(AT, alive, x, tol, max_iter):
+    # shifted power iteration x <- x + A^T x on the nodes still in the graph,
+    # as nx.eigenvector_centrality does; None if it did not converge
+    for _ in range(max_iter):
+        last = x
+        x = alive * (last + AT @ last)
+        norm = np.linalg.norm(x)
+        if norm == 0:
+            return x
+        x /= norm
+        if np.abs(x - last).sum() < alive.sum() * tol:
+            return x
+    return None
+
+# eigen centrality
+# The eigenvector of the previous pick, without the picked node, is where the
+# next one starts from, so after the first pick a few mat-vecs usually do.
+def eigen(g, config, budget, tol=1e-6, max_iter=1000):
+    cg = compile_graph(g, config)
+    # unweighted, as nx.eigenvector_centrality_numpy(g) was
+    AT = cg.adjacency.T.tocsr().astype(float)
+    alive = np.ones(cg.n)
+    x = alive / np.sqrt(cg.n)
 
-    for k in range(budget):
+    eig = []
 
-        n = g_greedy.number_of_nodes()
+    for k in range(_max_budget(budget)):
 
-        I = np.ones((n, 1))
+        centrality = _power_iteration(AT, alive, x, tol, max_iter)
+        if centrality is None:
+            # slow convergence: Lanczos/Arnoldi on the remaining graph, from the same start
+            index = np.flatnonzero(alive)
+            centrality = np.zeros(cg.n)
+            centrality[index] = _leading_eigenvector(AT.T[index][:, index], x[index] if x[index].any() else None)
+        x = centrality
 
-        C = np.ones((n, n))
-        N = np.ones((n, n))
+        selected = int(np.argmax(np.where(alive > 0, x, -np.inf)))
+        eig.append(cg.nodes[selected])
+        alive[selected] = 0
+        x = x * alive
+        if not x.any():
+            x = alive / np.sqrt(max(alive.sum(), 1))
 
-        A = nx.convert_matrix.to_numpy_array(g_greedy, nodelist=list(g_greedy.nodes()))
+    return _by_budget(eig, budget)
 
-        for i in range(5):
-            B = np.power(A, i + 1)
-            D = C - B
-            N = np.multiply(N, D)
+# degree
+def degree(g, config, budget):
+    cg = compile_graph(g, config)
+    A = cg.matrix()
+    A_in = A.tocsc()
+    # degree as networkx counts it: out + in for directed graphs, self-loops twice
+    loops = np.asarray(A.diagonal() != 0, dtype=np.int64)
+    degree = np.diff(cg.indptr) + (cg.in_degree if cg.directed else loops)
+    degree = degree.astype(float)
 
-        P = C - N
+    deg = []
 
-        pi = np.matmul(P, I)
+    for k in range(_max_budget(budget)):
+        selected = int(np.argmax(degree))
+        deg.append(cg.nodes[selected])
+        degree[selected] = -np.inf
+        # every neighbour of the removed node loses one edge per connection to it
+        np.subtract.at(degree, cg.indices[cg.indptr[selected]:cg.indptr[selected + 1]], 1)
+        if cg.directed:
+            np.subtract.at(degree, A_in.indices[A_in.indptr[selected]:A_in.indptr[selected + 1]], 1)
+
+    return _by_budget(deg, budget)
+
+def _masked_proxy(cg, P, budget):
+    # score of a node = sum of its row of P over the nodes still in the graph;
+    # removing a node only takes its column out of the rows that have an entry in it
+    P = P.tocsr()
+    P_in = P.tocsc()
+    alive = np.ones(cg.n)
+    score = P @ alive
 
-        value = {}
+    result = []
 
-        for i in range(n):
-            value[list(g_greedy.nodes())[i]] = pi[i, 0]
+    for k in range(_max_budget(budget)):
+        selected = int(np.argmax(np.where(alive > 0, score, -np.inf)))
+        result.append(cg.nodes[selected])
+        alive[selected] = 0
+        rows = P_in.indices[P_in.indptr[selected]:P_in.indptr[selected + 1]]
+        score[rows] = P[rows] @ alive
 
-        selected = sorted(value, key=value.get, reverse=True)[0]
+    return _by_budget(result, budget)
 
-        result.append(selected)
+# pi
+def pi(g, config, budget):
+    cg = compile_graph(g, config)
+    A = cg.matrix().astype(float)
 
-        g_greedy.remove_node(selected)
+    # P = 1 - prod_i (1 - A^i) elementwise for i = 1..5; zero wherever A is
+    N = np.ones_like(A.data)
+    for i in range(5):
+        N *= 1 - np.power(A.data, i + 1)
+    P = A.copy()
+    P.data = 1 - N
 
-    print(result)
-    return result
+    return _masked_proxy(cg, P, budget)
 
 # sigma
 def sigma(g, config, budget):
-    g_greedy = g.__class__()
-    g_greedy.add_nodes_from(g)
-    g_greedy.add_edges_from(g.edges)
+    cg = compile_graph(g, config)
+    A = cg.matrix().astype(float)
+    powers = []
+    for i in range(5):
+        B = A.copy()
+        B.data = np.power(A.data, i + 1)
+        powers.append(B)
 
-    for a, b in g_greedy.edges():
-        weight = config.config["edges"]['threshold'][(a, b)]
-        g_greedy[a][b]['weight'] = weight
+    alive = np.ones(cg.n)
 
     result = []
 
-    for k in range(budget):
-
-        n = g_greedy.number_of_nodes()
-
-        I = np.ones((n, 1))
-
-        F = np.ones((n, n))
-        N = np.ones((n, n))
-
-        A = nx.convert_matrix.to_numpy_array(g, nodelist=g_greedy.nodes())
-
-        sigma = I
-        for i in range(5):
-            B = np.power(A, i + 1)
-            C = np.matmul(B, I)
-            sigma += C
+    for k in range(_max_budget(budget)):
 
-        value = {}
+        # sigma <- sigma + A^i @ sigma (elementwise powers) for i = 1..5,
+        # starting from the nodes still in the graph
+        sigma = alive.copy()
+        for B in powers:
+            sigma += alive * (B @ sigma)
 
-        for i in range(n):
-            value[list(g_greedy.nodes())[i]] = sigma[i, 0]
+        selected = int(np.argmax(np.where(alive > 0, sigma, -np.inf)))
 
-        selected = sorted(value, key=value.get, reverse=True)[0]
+        result.append(cg.nodes[selected])
 
-        result.append(selected)
+        alive[selected] = 0
 
-        g_greedy.remove_node(selected)
+    return _by_budget(result, budget)
 
-    print(result)
-    return result
+def _top_eigenpair(A, v0=None):
+    # largest algebraic eigenpair of a symmetric sparse matrix
+    if A.shape[0] < 3:
+        lam, u = np.linalg.eigh(A.toarray())
+        return lam[-1], u[:, -1]
+    lam, u = sp.sparse.linalg.eigsh(A, k=1, which='LA', v0=v0)
+    return lam[0], u[:, 0]
 
-def Netshield(g, config, budget):
+# NetShield (Tong et al., 2010); with ``batch``, NetShield+: after every
+# ``batch`` picks the picked nodes are masked out of the graph and the
+# eigenpair is solved again, warm-started from the previous eigenvector.
+# Directed graphs use the symmetric part of their adjacency.
+def Netshield(g, config, budget, batch=None):
+    cg = compile_graph(g, config)
+    A = cg.matrix().astype(float)
+    if cg.directed:
+        A = (A + A.T) / 2
+    A = A.tocsc()
 
-    g_greedy = g.__class__()
-    g_greedy.add_nodes_from(g)
-    g_greedy.add_edges_from(g.edges)
+    k = _max_budget(budget)
+    batch = k if batch is None else batch
+    alive = np.ones(cg.n)
+    u = None
 
-    for a, b in g_greedy.edges():
-        weight = config.config["edges"]['threshold'][(a, b)]
-        g_greedy[a][b]['weight'] = weight
-
-    A = nx.adjacency_matrix(g_greedy)
-
-    lam, u = np.linalg.eigh(A.toarray())
-    lam = list(lam)
-    lam = lam[-1]
-
-    u = u[:, -1]
+    nodes = []
+    while len(nodes) < k:
+        if nodes:
+            D = sp.sparse.diags(alive)
+            M = D @ A @ D
+        else:
+            M = A
+        if not M.data.any():
+            # no edges left to break: the rest of the budget goes by degree
+            rest = np.flatnonzero(alive)
+            rest = rest[np.argsort(-np.diff(A.indptr)[rest], kind='stable')]
+            nodes.extend(rest[:k - len(nodes)].tolist())
+            break
+        if nodes:
+            # the previous vector may live on nodes that have no edges left
+            v0 = u * alive
+            lam, u = _top_eigenpair(M, v0 if (M @ v0).any() else None)
+        else:
+            lam, u = _top_eigenpair(A)
 
-    u = np.abs(np.real(u).flatten())
-    v = (2 * lam * np.ones(len(u))) * np.power(u, 2)
+        u = np.abs(u)
+        v = 2 * lam * np.power(u, 2)
+        # b = A[:, picked] @ u[picked] over the picks of this batch
+        b = np.zeros(cg.n)
 
-    nodes = []
-    for i in range(budget):
-        B = A[:, nodes]
-        b = B * u[nodes]
+        for i in range(min(batch, k - len(nodes))):
+            score = v - 2 * b * u
+            score[alive == 0] = -1
 
-        score = v - 2 * b * u
-        score[nodes] = -1
+            selected = int(np.argmax(score))
+            nodes.append(selected)
+            alive[selected] = 0
 
-        nodes.append(np.argmax(score))
+            column = slice(A.indptr[selected], A.indptr[selected + 1])
+            b[A.indices[column]] += A.data[column] * u[selected]
 
-    print(nodes)
-    return nodes
+    nodes = [cg.nodes[i] for i in nodes]
+    return _by_budget(nodes, budget)
 
 # IMRank
 # https://github.com/Braylon1002/IMTool
@@ -378,26 +511,87 @@ def IMRank(g, config, budget):
 def RIS(g, config, budget, rounds=100):
 #     mc = 100
     # Generate mc RRSs
-    R = [get_RRS(g, config) for _ in range(rounds)]
+    cg = compile_graph(g, config)
+    sampler = RRSampler(cg, 'IC')
+    R = RRCollection(cg.n)
+    R.extend(*sampler.sample(rounds))
+    live = np.ones(rounds, dtype=bool)
+
+    # number of live RRSs containing every node, updated in place
+    counts = R.node_counts()
+    chosen = np.zeros(cg.n, dtype=bool)
 
     selected = []
     for _ in range(budget):
-        # Collect all nodes from all RRSs
-        flat_map = [item for subset in R for item in subset]
-        # Only proceed if there are nodes in the flat_map
-        if flat_map:
-            seed = Counter(flat_map).most_common()[0][0]
-            selected.append(seed)
+        seed = int(np.argmax(np.where(chosen, -1, counts)))
+        selected.append(cg.nodes[seed])
+        chosen[seed] = True
 
-            R = [rrs for rrs in R if seed not in rrs]
+        removed = R.sets_of(seed)
+        removed = removed[live[removed]]
+        live[removed] = False
+        counts -= np.bincount(R.members_of(removed), minlength=cg.n)
 
-            # For every removed RRS, generate a new one
-            while len(R) < rounds:
-                R.append(get_RRS(g, config))
+        # For every removed RRS, generate a new one
+        first = len(R)
+        R.extend(*sampler.sample(removed.size))
+        live = np.concatenate([live, np.ones(removed.size, dtype=bool)])
+        counts += np.bincount(R.members_of(np.arange(first, len(R))), minlength=cg.n)
 
     print(selected)
     return (selected)
 
+# OPIM-C
+# Tang et al., Online Processing Algorithms for Influence Maximization, SIGMOD 2018
+def OPIMC(g, config, budget, model='IC', epsilon=0.1, delta=None, n_jobs=1, random_state=None, stats=None):
+    """Seeds with a certified (1 - 1/e - epsilon) approximation, w.p. 1 - delta.
+
+    Seeds are picked by max coverage on one pool of RR sets and checked on an
+    independent second pool: the lower bound on their spread from the second
+    pool over the upper bound on the optimum from the first is the certified
+    ratio. Both pools double until that ratio reaches 1 - 1/e - epsilon, so
+    on most graphs far fewer sets are drawn than IMM's worst-case theta.
+
+    Returns the seeds and the certified ratio; pass a SamplingStats as
+    ``stats`` to get the sizes and timings of every round.
+    """
+    cg = compile_graph(g, config)
+    n, k = cg.n, budget
+    delta = 1 / n if delta is None else delta
+    stats = SamplingStats() if stats is None else stats
+
+    log_cnk = math.lgamma(n + 1) - math.lgamma(k + 1) - math.lgamma(n - k + 1)
+    e = 1 - 1 / math.e
+    theta_max = 2 * n * (e * math.sqrt(math.log(6 / delta))
+                         + math.sqrt(e * (log_cnk + math.log(6 / delta)))) ** 2 / (epsilon ** 2 * k)
+    theta = max(1, int(theta_max * epsilon ** 2 * k / n))
+    i_max = max(1, math.ceil(math.log2(theta_max / theta)))
+    a = math.log(3 * i_max / delta)
+
+    first, second = np.random.SeedSequence(random_state).spawn(2)
+    R1, R2 = RRCollection(n), RRCollection(n)
+    with ParallelRRSampler(cg, model, first, n_jobs) as sample1, ParallelRRSampler(cg, model, second, n_jobs) as sample2:
+        for i in range(1, i_max + 1):
+            start = time.time()
+            R1.extend(*sample1.sample(theta - len(R1)))
+            R2.extend(*sample2.sample(theta - len(R2)))
+            sampled = time.time()
+
+            selected, _, upper = R1.max_coverage(k, upper_bound=True)
+            lower = R2.coverage(selected)
+            # concentration bounds on the two coverage counts
+            low = ((math.sqrt(lower * theta + 2 * a / 9) - math.sqrt(a / 2)) ** 2 - a / 18) * n / theta
+            up = (math.sqrt(upper * theta + a / 2) + math.sqrt(a / 2)) ** 2 * n / theta
+            ratio = max(low, 0) / up
+            stats.add('round %d' % i, theta, 2 * theta, sampled - start, time.time() - sampled, lower)
+
+            if ratio >= e - epsilon:
+                break
+            theta *= 2
+
+    selected = [cg.nodes[v] for v in selected]
+    return selected, ratio
+
 # def IMM(g, config, budget, rounds=100, model='SI', beta=0.1):
 #     l = 1
 #     epsilon = 0.1
@@ -468,22 +662,10 @@ def LFA(matrix):
     return Mr
 
 
-def get_RRS(g, config):
+def get_RRS(g, config, model='IC'):
     """
     Inputs: g: Network graph
             config: Configuration object for the IC model
     Outputs: A random reverse reachable set expressed as a list of nodes
     """
-    # get edges according to the propagation probability
-    edges = [(u, v) for (u, v, d) in g.edges(data=True) if uniform(0, 1) < config.config["edges"]['threshold'][(u, v)]]
-    
-    # create a subgraph based on the edges
-    g_sub = g.edge_subgraph(edges)
-    
-    # select a random node as the starting point that is part of the subgraph
-    source = random.choice(list(g_sub.nodes()))
-    
-    # perform a depth-first traversal from the source node to get the RRS
-    RRS = list(nx.dfs_preorder_nodes(g_sub, source))
-    return RRS
-
+    return RRSampler(compile_graph(g, config), model).sets(1)[0]
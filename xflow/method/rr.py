@@ -0,0 +1,457 @@
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from xflow.diffusion.engine import check_random_state
+from xflow.diffusion.parallel import effective_n_jobs
+from xflow.diffusion.shared import SharedGraph, attach
+
+# Reverse-reachable (RR) set sampling.
+#
+# An RR set holds the nodes that reach a uniformly random root in one random
+# live-edge world, and n times the probability that a seed set hits a random
+# RR set is its expected spread, which is what RIS and IMM estimate. The
+# sampler grows a batch of RR sets at once by a breadth-first walk over the
+# reverse CSR of the compiled graph, drawing coins only for the in-edges of
+# nodes it reaches, so a set costs time in proportion to its own size rather
+# than a pass over every edge of the graph.
+#
+# Like the worlds of the diffusion engine, the sets of a batch are tracked as
+# flat set * n + node keys. Models:
+#   IC - in-edge (u, v) is live with p = threshold of (u, v)
+#   WC - weighted cascade: IC with p = 1 / in-degree of v
+#   LT - every node keeps one in-edge picked uniformly at random, the
+#        live-edge form of LT with uniform thresholds, so an RR set is a
+#        reverse random walk that stops at a node already in the set
+#   SI - without a horizon every in-edge eventually fires, so an RR set is
+#        everything that reaches the root
+#
+# ParallelRRSampler draws the sets in fixed-size chunks over a process pool,
+# chunk i from the i-th child of one root SeedSequence, and merges them in
+# chunk order, so a random_state gives the same sets for any n_jobs.
+#
+# An RRCollection stores many RR sets as flat int32 arrays (offsets into one
+# members array) with a node -> sets inverted index in the same layout, and
+# runs greedy maximum coverage on them in time linear in their total size.
+
+MODELS = ('IC', 'WC', 'LT', 'SI')
+
+CHUNK_SETS = 1 << 14
+
+
+def _ranges(starts, ends):
+    """Concatenation of np.arange(s, e) for every pair, like CompiledGraph.edges_of."""
+    counts = ends - starts
+    total = int(counts.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    return np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(total)
+
+
+class _KeySet:
+    """Set of int64 keys kept as a few sorted runs, merged when a run outgrows the one before.
+
+    Adding k keys and testing k keys against v stored ones cost about
+    O(k log v), instead of the O(v) of re-sorting everything each time.
+    """
+
+    def __init__(self, keys):
+        self.runs = [keys]
+
+    def contains(self, keys):
+        found = np.zeros(keys.size, dtype=bool)
+        for run in self.runs:
+            pos = np.minimum(np.searchsorted(run, keys), run.size - 1)
+            found |= run[pos] == keys
+        return found
+
+    def add(self, keys):
+        # keys must be sorted and new
+        if keys.size == 0:
+            return
+        self.runs.append(keys)
+        while len(self.runs) > 1 and 2 * self.runs[-1].size >= self.runs[-2].size:
+            last = self.runs.pop()
+            self.runs[-1] = np.sort(np.concatenate([self.runs[-1], last]))
+
+    def keys(self):
+        return np.sort(np.concatenate(self.runs))
+
+
+class RRSampler:
+    """Batched reverse-BFS sampler of RR sets on a CompiledGraph.
+
+    Parameters
+    ----------
+    cg : CompiledGraph
+    model : str
+        'IC', 'WC' or 'LT'
+    random_state : None, int or numpy Generator
+    batch_size : int
+        RR sets grown together; bounds the memory of one batch
+    """
+
+    def __init__(self, cg, model='IC', random_state=None, batch_size=1 << 14):
+        self.model = model.upper()
+        if self.model not in MODELS:
+            raise ValueError(f"Unknown RR-set model: {model}")
+        self.cg = cg
+        self.rev = cg.reverse()
+        self.rng = check_random_state(random_state)
+        self.batch_size = batch_size
+        if self.model == 'WC':
+            in_degree = np.diff(self.rev.indptr)
+            self.p = np.repeat(1.0 / np.maximum(in_degree, 1), in_degree)
+        elif self.model == 'SI':
+            self.p = np.ones(self.rev.m)
+        else:
+            self.p = self.rev.weights
+
+    def _batch(self, roots):
+        """Sorted set * n + node keys of the RR sets of ``roots``."""
+        n, rev, rng = self.cg.n, self.rev, self.rng
+        frontier = np.arange(roots.size, dtype=np.int64) * n + roots
+        visited = _KeySet(frontier)
+        while frontier.size:
+            sets, v = np.divmod(frontier, n)
+            if self.model == 'LT':
+                degree = rev.indptr[v + 1] - rev.indptr[v]
+                walk = degree > 0
+                pick = rev.indptr[v[walk]] + (rng.random(int(walk.sum())) * degree[walk]).astype(np.int64)
+                keys = sets[walk] * n + rev.indices[pick]
+            else:
+                edges, counts = rev.edges_of(v, return_counts=True)
+                live = rng.random(edges.size) < self.p[edges]
+                keys = np.repeat(sets, counts)[live] * n + rev.indices[edges[live]]
+            keys = np.unique(keys)
+            frontier = keys[~visited.contains(keys)]
+            visited.add(frontier)
+        return visited.keys()
+
+    def sample(self, count):
+        """Draw ``count`` RR sets as flat arrays.
+
+        Returns ``offsets`` (int64, count + 1) and ``members`` (int32 node
+        indices): set i is ``members[offsets[i]:offsets[i + 1]]``.
+        """
+        n = self.cg.n
+        members, sizes = [], []
+        for start in range(0, count, self.batch_size):
+            size = min(self.batch_size, count - start)
+            roots = (self.rng.random(size) * n).astype(np.int64)
+            sets, nodes = np.divmod(self._batch(roots), n)
+            members.append(nodes.astype(np.int32))
+            sizes.append(np.bincount(sets, minlength=size))
+        offsets = np.zeros(count + 1, dtype=np.int64)
+        if count:
+            np.cumsum(np.concatenate(sizes), out=offsets[1:])
+        members = np.concatenate(members) if members else np.empty(0, dtype=np.int32)
+        return offsets, members
+
+    def sets(self, count):
+        """Draw ``count`` RR sets as lists of node labels."""
+        offsets, members = self.sample(count)
+        nodes = self.cg.nodes
+        members = members.tolist()
+        return [[nodes[i] for i in members[offsets[k]:offsets[k + 1]]] for k in range(count)]
+
+
+class RRCollection:
+    """RR sets over nodes 0..n-1 stored as flat arrays.
+
+    Set i is ``members[offsets[i]:offsets[i + 1]]``. Sets are only ever
+    appended; the node -> sets index is rebuilt lazily after an append,
+    except that ``sets_of`` indexes just the appended sets and merges them
+    into the full index once they outgrow it, as _KeySet merges its runs.
+
+    Parameters
+    ----------
+    n : int
+        number of nodes
+    """
+
+    def __init__(self, n):
+        self.n = n
+        self._offsets = np.zeros(1024, dtype=np.int64)
+        self._members = np.empty(1024, dtype=np.int32)
+        self.count = 0
+        self.size = 0
+        self._index = None
+
+    @property
+    def offsets(self):
+        return self._offsets[:self.count + 1]
+
+    @property
+    def members(self):
+        return self._members[:self.size]
+
+    def __len__(self):
+        return self.count
+
+    @staticmethod
+    def _grow(array, needed):
+        if needed <= array.size:
+            return array
+        grown = np.empty(max(needed, 2 * array.size), dtype=array.dtype)
+        grown[:array.size] = array
+        return grown
+
+    def extend(self, offsets, members):
+        """Append the sets of flat ``(offsets, members)`` arrays, as drawn by RRSampler.sample."""
+        added = len(offsets) - 1
+        self._offsets = self._grow(self._offsets, self.count + added + 1)
+        self._members = self._grow(self._members, self.size + len(members))
+        self._offsets[self.count + 1:self.count + added + 1] = self.size + offsets[1:]
+        self._members[self.size:self.size + len(members)] = members
+        self.count += added
+        self.size += len(members)
+
+    def fill(self, count, sampler):
+        """Draw sets from ``sampler`` until there are at least ``count``."""
+        if count > self.count:
+            self.extend(*sampler.sample(count - self.count))
+
+    def head(self, count):
+        """The first ``count`` sets as an RRCollection sharing this one's arrays."""
+        count = min(count, self.count)
+        head = RRCollection.__new__(RRCollection)
+        head.n = self.n
+        head.count = count
+        head.size = int(self.offsets[count])
+        head._offsets = self._offsets
+        head._members = self._members
+        head._index = None
+        return head
+
+    def set_ids(self):
+        """Set id of every entry of ``members``."""
+        return np.repeat(np.arange(self.count, dtype=np.int32), np.diff(self.offsets))
+
+    def _build_index(self, first, last):
+        # (node_ptr, sets) over sets first:last, sets in increasing order per node
+        offsets = self.offsets[first:last + 1]
+        members = self.members[offsets[0]:offsets[-1]]
+        order = np.argsort(members, kind='stable')
+        node_ptr = np.zeros(self.n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(members, minlength=self.n), out=node_ptr[1:])
+        ids = np.repeat(np.arange(first, last, dtype=np.int32), np.diff(offsets))
+        return node_ptr, ids[order]
+
+    @property
+    def index(self):
+        """Inverted index ``(node_ptr, sets)``: the sets containing v are ``sets[node_ptr[v]:node_ptr[v + 1]]``."""
+        if self._index is None or self._indexed < self.count or self._runs:
+            self._index = self._build_index(0, self.count)
+            self._indexed, self._runs = self.count, []
+        return self._index
+
+    def sets_of(self, node):
+        """Ids of the sets containing ``node``, in increasing order."""
+        if self._index is None:
+            self.index
+        elif self._indexed < self.count:
+            # index only the sets appended since, until they outgrow the full index
+            self._runs.append(self._build_index(self._indexed, self.count))
+            self._indexed = self.count
+            if sum(sets.size for _, sets in self._runs) > self._index[1].size:
+                self.index
+        parts = [sets[node_ptr[node]:node_ptr[node + 1]] for node_ptr, sets in [self._index] + self._runs]
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def members_of(self, sets):
+        """Members of the given sets, concatenated."""
+        offsets = self.offsets
+        return self.members[_ranges(offsets[sets], offsets[sets + 1])]
+
+    def node_counts(self):
+        """Number of sets containing every node."""
+        return np.bincount(self.members, minlength=self.n)
+
+    def coverage(self, nodes):
+        """Fraction of the sets that contain at least one of ``nodes``."""
+        if self.count == 0:
+            return 0.0
+        hit = np.isin(self.members, np.asarray(nodes, dtype=np.int64))
+        # every set holds at least its root, so no two starts coincide
+        return int(np.logical_or.reduceat(hit, self.offsets[:-1]).sum()) / self.count
+
+    def spread(self, nodes):
+        """Unbiased estimate of the expected spread of ``nodes``: n times the fraction of sets they hit."""
+        return self.n * self.coverage(nodes)
+
+    def max_coverage(self, k, upper_bound=False):
+        """Greedy maximum coverage of the sets by ``k`` nodes.
+
+        Node counts are decremented in place as sets get covered and the
+        nodes sit in a bucket queue keyed by their count; a node popped with
+        a stale count is only moved down to its current bucket. The work is
+        linear in the total size of the sets plus the number of nodes.
+
+        Returns the k node indices and the fraction of sets they cover. With
+        ``upper_bound`` also an upper bound on the fraction any k nodes can
+        cover: the least, over the greedy prefixes S_j, of the coverage of
+        S_j plus the k largest marginal counts given S_j (O(n) per prefix).
+        """
+        node_ptr, sets = self.index
+        counts = np.diff(node_ptr)
+        covered = np.zeros(self.count, dtype=bool)
+
+        top = int(counts.max()) if self.n else 0
+        # nodes of equal count pop lowest index first
+        order = np.lexsort((-np.arange(self.n), counts))
+        bounds = np.searchsorted(counts[order], np.arange(top + 2))
+        order = order.tolist()
+        buckets = [order[bounds[c]:bounds[c + 1]] for c in range(top + 1)]
+
+        def bound():
+            largest = counts if k >= self.n else np.partition(counts, self.n - k)[self.n - k:]
+            return hit + int(largest.sum())
+
+        selected, hit = [], 0
+        best = bound() if upper_bound else None
+        while len(selected) < k and top > 0:
+            if not buckets[top]:
+                top -= 1
+                continue
+            v = buckets[top].pop()
+            if counts[v] != top:
+                buckets[counts[v]].append(v)
+                continue
+            selected.append(v)
+            new = sets[node_ptr[v]:node_ptr[v + 1]]
+            new = new[~covered[new]]
+            covered[new] = True
+            hit += new.size
+            np.subtract.at(counts, self.members_of(new), 1)
+            if upper_bound:
+                best = min(best, bound())
+
+        # every set is covered: fill up with the lowest unselected indices
+        if len(selected) < k:
+            taken = set(selected)
+            selected += [v for v in range(self.n) if v not in taken][:k - len(selected)]
+        if upper_bound:
+            return selected, hit / max(self.count, 1), best / max(self.count, 1)
+        return selected, hit / max(self.count, 1)
+
+
+_worker = {}
+
+
+def _init_worker(graph):
+    _worker['cg'] = attach(graph)
+
+
+def _sample_chunk(model, count, stream):
+    return RRSampler(_worker['cg'], model, np.random.default_rng(stream)).sample(count)
+
+
+class ParallelRRSampler:
+    """RRSampler spread over ``n_jobs`` processes (-1 for all cores).
+
+    The pool and the shared copy of the graph live until ``close()`` (or the
+    end of a ``with`` block), so repeated ``sample`` calls, like the phases of
+    IMM, only pay for the new sets. The k-th chunk drawn since creation always
+    comes from the k-th child stream of ``random_state``.
+
+    Parameters
+    ----------
+    cg : CompiledGraph or SharedGraph
+    model : str
+        'IC', 'WC', 'LT' or 'SI'
+    random_state : int, SeedSequence or None
+    n_jobs : int
+    chunk_sets : int
+        RR sets per chunk; the sets only depend on random_state and chunk_sets
+    """
+
+    def __init__(self, cg, model='IC', random_state=None, n_jobs=1, chunk_sets=CHUNK_SETS):
+        self.model = model.upper()
+        if self.model not in MODELS:
+            raise ValueError(f"Unknown RR-set model: {model}")
+        if not isinstance(random_state, np.random.SeedSequence):
+            random_state = np.random.SeedSequence(random_state)
+        self.root = random_state
+        self.n_jobs = effective_n_jobs(n_jobs)
+        self.chunk_sets = chunk_sets
+        self.cg = attach(cg)
+        self._given = cg
+        self._shared = None
+        self._pool = None
+        if self.n_jobs > 1:
+            self._shared = cg if isinstance(cg, SharedGraph) else SharedGraph(self.cg)
+            self._pool = ProcessPoolExecutor(max_workers=self.n_jobs, initializer=_init_worker,
+                                             initargs=(self._shared,))
+
+    def sample(self, count):
+        """Draw ``count`` more RR sets as flat ``(offsets, members)``, see RRSampler.sample."""
+        sizes = [min(self.chunk_sets, count - start) for start in range(0, count, self.chunk_sets)]
+        streams = self.root.spawn(len(sizes))
+        if self._pool is None:
+            _init_worker(self.cg)
+            chunks = [_sample_chunk(self.model, size, stream) for size, stream in zip(sizes, streams)]
+        else:
+            futures = [self._pool.submit(_sample_chunk, self.model, size, stream)
+                       for size, stream in zip(sizes, streams)]
+            chunks = [future.result() for future in futures]
+
+        offsets = np.zeros(count + 1, dtype=np.int64)
+        if chunks:
+            sizes = np.concatenate([np.diff(chunk[0]) for chunk in chunks])
+            np.cumsum(sizes, out=offsets[1:])
+            members = np.concatenate([chunk[1] for chunk in chunks])
+        else:
+            members = np.empty(0, dtype=np.int32)
+        return offsets, members
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        if self._shared is not None and self._shared is not self._given:
+            self._shared.close()
+        self._shared = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SamplingStats:
+    """Timings and sizes of the phases of an RR-set based run such as IMM.
+
+    Attributes
+    ----------
+    phases : list of dict
+        one entry per phase with its name, the target number of sets
+        ``theta``, the number of sets held after it, the seconds spent
+        sampling and selecting, and the coverage of the selected seeds
+    lower_bound : float or None
+        the lower bound on the optimal spread the estimation phase settled on
+    """
+
+    def __init__(self):
+        self.phases = []
+        self.lower_bound = None
+
+    def add(self, name, theta, sets, sample_time, selection_time=0.0, coverage=None):
+        self.phases.append(dict(name=name, theta=theta, sets=sets, sample_time=sample_time,
+                                selection_time=selection_time, coverage=coverage))
+
+    @property
+    def sets(self):
+        return self.phases[-1]['sets'] if self.phases else 0
+
+    @property
+    def sample_time(self):
+        return sum(phase['sample_time'] for phase in self.phases)
+
+    @property
+    def selection_time(self):
+        return sum(phase['selection_time'] for phase in self.phases)
+
+    def __repr__(self):
+        return (f"SamplingStats(phases={len(self.phases)}, sets={self.sets}, "
+                f"sample_time={self.sample_time:.3f}, selection_time={self.selection_time:.3f})")
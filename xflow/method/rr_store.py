@@ -0,0 +1,236 @@
+import hashlib
+import json
+import os
+import numpy as np
+
+from xflow.diffusion.cache import fingerprint
+from xflow.diffusion.engine import STEPS
+from xflow.diffusion.estimate import SpreadEstimate
+from xflow.diffusion.parallel import parallel_simulate
+from xflow.method.rr import CHUNK_SETS, MODELS, RRCollection, ParallelRRSampler
+
+# RR sets kept on disk.
+#
+# Drawing millions of RR sets for a large graph takes minutes, and a pool of
+# them stays valid for any budget and any seed set as long as the graph, its
+# weights and the model do not change. An RRStore keeps one such pool in a
+# directory named by a digest of (graph structure, edge weights, model, seed,
+# chunk size), as two flat binary files mapped into memory:
+#   offsets.bin - int64, count + 1 entries, set i spans offsets[i]:offsets[i + 1]
+#   members.bin - int32, size entries
+#   meta.json   - count, size and the key the pool was drawn for
+# Sets are drawn in whole chunks, chunk i from the i-th child stream of the
+# seed as in ParallelRRSampler, so a pool of N sets is the same whether it was
+# drawn in one go or grown over several runs. meta.json is replaced only after
+# the arrays are written, and data past the sizes it records is ignored, so an
+# interrupted append leaves the previous pool intact.
+#
+# estimate_spread answers spread queries from such a pool: n times the
+# fraction of RR sets a seed set hits is an unbiased estimate of its spread,
+# and the hit fraction is a binomial proportion, so a normal interval around
+# it bounds the error. One pass over the members costs far less than the
+# 1000 cascades per seed set of a Monte Carlo estimate, and the pool is
+# shared by every seed set evaluated on the graph.
+
+
+class RRStore(RRCollection):
+    """Persistent, memory-mapped RR sets of one graph, model and seed.
+
+    Opening a store on the same graph, weights, model and ``random_state``
+    reuses the sets drawn by earlier runs; ``fill`` only draws the missing ones.
+
+    Parameters
+    ----------
+    root : str
+        directory holding the stores, one subdirectory per key
+    cg : CompiledGraph
+    model : str
+        'IC', 'WC', 'LT' or 'SI'
+    random_state : int
+        seed of the pool; part of its key, so it can not be None
+    n_jobs : int
+        processes drawing new sets
+    chunk_sets : int
+        RR sets per chunk
+    """
+
+    def __init__(self, root, cg, model='IC', random_state=0, n_jobs=1, chunk_sets=CHUNK_SETS):
+        model = model.upper()
+        if model not in MODELS:
+            raise ValueError(f"Unknown RR-set model: {model}")
+        if random_state is None:
+            raise ValueError("an RRStore needs an integer random_state to be found again")
+        self.cg = cg
+        self.model = model
+        self.random_state = int(random_state)
+        self.n_jobs = n_jobs
+        self.chunk_sets = chunk_sets
+        self.n = cg.n
+        self._index = None
+
+        graph, weights = fingerprint(cg)
+        self.key = {'graph': graph, 'weights': weights, 'model': model,
+                    'random_state': self.random_state, 'chunk_sets': chunk_sets}
+        digest = hashlib.blake2b(json.dumps(self.key, sort_keys=True).encode(), digest_size=16)
+        self.path = os.path.join(root, digest.hexdigest())
+        os.makedirs(self.path, exist_ok=True)
+
+        meta = self._file('meta.json')
+        if os.path.exists(meta):
+            with open(meta) as f:
+                meta = json.load(f)
+            self.count, self.size = meta['count'], meta['size']
+        else:
+            with open(self._file('offsets.bin'), 'wb') as f:
+                f.write(np.zeros(1, dtype=np.int64).tobytes())
+            open(self._file('members.bin'), 'wb').close()
+            self.count, self.size = 0, 0
+            self._commit()
+        self._map()
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _map(self):
+        self._offsets = np.memmap(self._file('offsets.bin'), dtype=np.int64, mode='r', shape=(self.count + 1,))
+        if self.size:
+            self._members = np.memmap(self._file('members.bin'), dtype=np.int32, mode='r', shape=(self.size,))
+        else:
+            self._members = np.empty(0, dtype=np.int32)
+
+    def _commit(self):
+        meta = dict(self.key, n=self.n, count=self.count, size=self.size)
+        tmp = self._file('meta.json.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._file('meta.json'))
+
+    @staticmethod
+    def _append(path, at, array):
+        # overwrite whatever an interrupted append left past the recorded end
+        with open(path, 'r+b') as f:
+            f.seek(at * array.itemsize)
+            f.write(array.tobytes())
+            f.truncate()
+
+    def extend(self, offsets, members):
+        """Append the sets of flat ``(offsets, members)`` arrays to the files.
+
+        Only ``fill`` keeps the pool reproducible; sets appended directly
+        should come from the next chunks of the store's own stream.
+        """
+        added = len(offsets) - 1
+        # let go of the maps first: the files are rewritten and truncated below
+        self._offsets = self._members = None
+        self._append(self._file('offsets.bin'), self.count + 1,
+                     np.asarray(self.size + offsets[1:], dtype=np.int64))
+        self._append(self._file('members.bin'), self.size, np.asarray(members, dtype=np.int32))
+        self.count += added
+        self.size += len(members)
+        self._commit()
+        self._map()
+        self._index = None
+
+    def fill(self, count, sampler=None):
+        """Draw sets until there are at least ``count``, in whole chunks.
+
+        ``sampler`` is ignored: the new sets always continue the store's own
+        stream, so that the pool does not depend on how it was grown.
+        """
+        if count <= self.count:
+            return
+        done = self.count // self.chunk_sets
+        chunks = -(-count // self.chunk_sets) - done
+        root = np.random.SeedSequence(self.random_state)
+        root.spawn(done)  # streams of the chunks already on disk
+        with ParallelRRSampler(self.cg, self.model, root, self.n_jobs, self.chunk_sets) as sampler:
+            offsets, members = sampler.sample(chunks * self.chunk_sets)
+        # a pool written by extend() may end inside a chunk
+        skip = self.count - done * self.chunk_sets
+        self.extend(offsets[skip:] - offsets[skip], members[offsets[skip]:])
+
+    def clear(self):
+        """Drop every set, from disk too."""
+        self._offsets = self._members = None
+        with open(self._file('offsets.bin'), 'wb') as f:
+            f.write(np.zeros(1, dtype=np.int64).tobytes())
+        open(self._file('members.bin'), 'wb').close()
+        self.count, self.size = 0, 0
+        self._commit()
+        self._map()
+        self._index = None
+
+    def __repr__(self):
+        return f"RRStore(path={self.path!r}, model={self.model!r}, sets={self.count}, members={self.size})"
+
+
+def rr_pool(cg, model='IC', sets=1 << 17, store=None, random_state=None, n_jobs=1):
+    """At least ``sets`` RR sets of ``cg`` under ``model``, kept for later calls.
+
+    With ``store`` the pool is the RRStore in that directory (seed 0 if
+    ``random_state`` is None); otherwise it lives in memory on ``cg``, one
+    per model and integer or None ``random_state``, and grows as needed.
+    """
+    model = model.upper()
+    if store is not None:
+        pool = RRStore(store, cg, model, 0 if random_state is None else random_state, n_jobs)
+        pool.fill(sets)
+        return pool
+
+    pools = getattr(cg, '_rr_pools', None)
+    if pools is None:
+        pools = cg._rr_pools = {}
+    key = (model, random_state)
+    if key not in pools:
+        pools[key] = (RRCollection(cg.n), np.random.SeedSequence(random_state))
+    pool, root = pools[key]
+    if sets > len(pool):
+        # the root keeps count of the streams it spawned, so growth continues the stream
+        with ParallelRRSampler(cg, model, root, n_jobs) as sampler:
+            pool.fill(sets, sampler)
+    return pool
+
+
+def estimate_spread(cg, model, seeds, method='rr', sets=1 << 17, store=None, rounds=1000, horizon=STEPS,
+                    beta=0.1, confidence=0.95, random_state=None, n_jobs=1):
+    """Expected spread of ``seeds`` with a confidence interval.
+
+    Parameters
+    ----------
+    cg : CompiledGraph
+    model : str
+        'IC', 'LT' or 'SI'; 'WC' too with method='rr'
+    seeds : iterable
+        node labels
+    method : str
+        'rr' - from an RR pool, see rr_pool; estimates the spread once no node
+        can change state, and for LT and SI that of the live-edge forms in
+        rr.py rather than the engine's threshold and beta semantics
+        'mc' - from ``rounds`` forward cascades of ``horizon`` steps
+    sets : int
+        RR sets the estimate uses at least
+    store : str or None
+        RRStore directory of the pool
+    rounds, horizon, beta :
+        Monte Carlo parameters, see parallel_simulate
+    confidence : float
+        confidence level of the interval
+    random_state : int or None
+    n_jobs : int
+
+    Returns
+    -------
+    SpreadEstimate
+        with method='rr', ``rounds`` is the number of RR sets and ``stdev`` that
+        of n times the hit indicator of one set
+    """
+    if method == 'mc':
+        results = parallel_simulate(cg, model, seeds, rounds, horizon, beta, random_state=random_state,
+                                    n_jobs=n_jobs)
+        return SpreadEstimate(results, confidence)
+    if method != 'rr':
+        raise ValueError(f"Unknown spread estimation method: {method}")
+
+    pool = rr_pool(cg, model, sets, store, random_state, n_jobs)
+    hit = pool.coverage(cg.to_index(list(seeds)))
+    return SpreadEstimate.from_moments(cg.n * hit, cg.n * np.sqrt(hit * (1 - hit)), len(pool), confidence)
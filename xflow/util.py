@@ -4,7 +4,7 @@ import numpy as np
 
 # TODO make seeds changable
 # def run (graph, diffusion, seeds, method, eval, epoch, budget, output):
-def run (graph, diffusion, method, eval, epoch, budget, output):
+def run (graph, diffusion, method, eval, epoch, budget, output, cache=None):
 
     print("Running " + eval.upper() + " :")
 
@@ -29,10 +29,12 @@ def run (graph, diffusion, method, eval, epoch, budget, output):
                         for diffusion_fn in diffusion:
                             try:
                                 print(diffusion_fn.__name__)
+                                # a SpreadCache shared by the whole sweep reuses every estimate already made
+                                kwargs = {} if cache is None else {'cache': cache}
                                 if eval == 'im':
-                                    sims = method_fn(g, config, budget, rounds=epoch, model=diffusion_fn.__name__, beta=0.1)
+                                    sims = method_fn(g, config, budget, rounds=epoch, model=diffusion_fn.__name__, beta=0.1, **kwargs)
                                 if eval == 'ibm':
-                                    sims = method_fn(g, config, budget, seeds, rounds=epoch, model=diffusion_fn.__name__, beta=0.1)
+                                    sims = method_fn(g, config, budget, seeds, rounds=epoch, model=diffusion_fn.__name__, beta=0.1, **kwargs)
                             except Exception as e:
                                 print(f"Error when calling {diffusion_fn.__name__}: {str(e)}")
 
@@ -10,6 +10,7 @@ import ndlib.models.epidemics as ep
 from ndlib.models.ModelConfig import Configuration
 import pandas as pd
 from dash import dash_table
+from xflow.diffusion import iteration_bunch
 
 # - - - - - - - - - - - - - - - - - - - - -
 # Set the number of simulation time steps
@@ -29,7 +30,7 @@ def get_sir_model(graph, num_infected, beta, gamma):
 
 def run_sir_model(model, time_steps):
     """Runs the given SIR model for the given number of time steps."""
-    return model.iteration_bunch(time_steps)
+    return iteration_bunch(model, time_steps)
 
 # Create two random graphs with different numbers of nodes
 network_layers = [nx.erdos_renyi_graph(20, 1), nx.erdos_renyi_graph(20, 1)]